@@ -1,11 +1,68 @@
 # Admin Models and Routes
 # Comprehensive admin panel for managing Revio platform
 
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List
+from pydantic import (
+    BaseModel, Field, ConfigDict, TypeAdapter, ValidationError, SkipValidation, AfterValidator
+)
+from typing import Optional, List, TypedDict, Literal, Annotated
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-import uuid
+from contextvars import ContextVar
+import os
 from enum import Enum
+import re
+
+# Public names; TypeAdapter and ValidationError are re-exported so routes can
+# bind them from here instead of going through pydantic's lazy module __getattr__
+__all__ = [
+    "TypeAdapter", "ValidationError",
+    "new_id", "request_clock", "utcnow", "Email",
+    "AdminRole", "BusinessStatus", "TagStatus", "TagType", "NotificationType",
+    "TicketStatus", "TicketPriority",
+    "AdminRoleT", "TagStatusT", "TagTypeT", "TicketStatusT", "TicketPriorityT",
+    "Admin", "AdminSession", "Tag",
+    "Notification", "SupportTicket", "SupportTicketWithBusiness", "DashboardStats", "BusinessUpdate",
+    "TagAssignment", "PromoCode", "PaymentGateway", "AuditLog",
+    "TagHistoryDoc", "AuditLogDoc",
+    "AdminLoginRequest", "TagCreateRequest", "TagBulkUpload", "TagUnassign",
+    "TagScrap", "TagReset", "TicketCreate", "TicketUpdate", "PromoCodeCreate",
+    "ResponseAdapter", "TagAdapter", "TagListAdapter", "AuditLogListAdapter",
+    "SupportTicketListAdapter", "AdminLoginRequestAdapter", "TagAssignmentAdapter",
+    "TagScrapAdapter", "TicketUpdateAdapter",
+]
+
+def new_id() -> str:
+    """Random 128-bit hex identifier (cheaper than str(uuid.uuid4()))"""
+    return os.urandom(16).hex()
+
+# Request-scoped clock, pinned once per request by the HTTP middleware in server.py
+request_clock: ContextVar[Optional[datetime]] = ContextVar("request_clock", default=None)
+
+def utcnow() -> datetime:
+    """Current UTC time, reusing the request's pinned timestamp when set"""
+    now = request_clock.get()
+    return now if now is not None else datetime.now(timezone.utc)
+
+# Lightweight email check for internal/admin data; registration keeps EmailStr
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def _check_email(value: str) -> str:
+    if not _EMAIL_RE.match(value):
+        raise ValueError("value is not a valid email address")
+    return value
+
+Email = Annotated[str, AfterValidator(_check_email)]
+
+# Shared model config: instances are immutable and never revalidated.
+# Schemas are built eagerly at import so the first request pays nothing.
+_CFG: ConfigDict = ConfigDict(
+    extra="ignore",
+    frozen=True,
+    revalidate_instances="never",
+    validate_assignment=False,
+    arbitrary_types_allowed=False,
+    defer_build=False
+)
 
 # Enums
 class AdminRole(str, Enum):
@@ -49,36 +106,43 @@ class TicketPriority(str, Enum):
     HIGH = "high"
     URGENT = "urgent"
 
+# Literal field types for hot-path models (validated as a set lookup in pydantic-core)
+# The Enum classes above remain the named constants used by application code
+AdminRoleT = Literal["super_admin", "admin", "manager"]
+TagStatusT = Literal["inactive", "active", "pending", "scrapped"]
+TagTypeT = Literal["qr", "nfc"]
+TicketStatusT = Literal["open", "pending", "resolved", "closed"]
+TicketPriorityT = Literal["low", "medium", "high", "urgent"]
+
 # Admin Models
 
 class Admin(BaseModel):
     """Admin user model"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    email: EmailStr
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
+    email: str  # Validated when the admin was created; rows come from the DB
     password_hash: str
     name: str
-    role: AdminRole = AdminRole.ADMIN
+    role: AdminRoleT = "admin"
     active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
     last_login: Optional[datetime] = None
 
 class AdminSession(BaseModel):
     """Admin session tracking"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     admin_id: str
     token: str
     expires_at: datetime
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
-class Tag(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Tag:
     """QR/NFC Tag model"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     tag_id: str  # Unique tag identifier (e.g., QR-A1B2C3D4)
-    tag_type: TagType  # qr or nfc
-    status: TagStatus = TagStatus.INACTIVE
+    tag_type: TagTypeT  # qr or nfc
+    status: TagStatusT = "inactive"
     business_id: Optional[str] = None
     assigned_at: Optional[datetime] = None
     activated_at: Optional[datetime] = None
@@ -86,50 +150,57 @@ class Tag(BaseModel):
     location: Optional[str] = None  # e.g., "Table 5", "Counter"
     scrap_reason: Optional[str] = None  # Reason for scrapping
     scrapped_at: Optional[datetime] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    id: str = field(default_factory=new_id)
+    created_at: datetime = field(default_factory=utcnow)
 
-class TagHistory(BaseModel):
-    """Tag history tracking"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    tag_id: str
-    action: str  # assigned, activated, unassigned, scrapped, reset
-    business_id: Optional[str] = None
-    admin_id: str
-    admin_email: str
-    details: Optional[dict] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+# Write-mostly records are slotted dataclasses: built by our own code, never validated
 
-class Notification(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Notification:
     """System notification model"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     type: NotificationType
     title: str
     message: str
     priority: str = "normal"  # low, normal, high, critical
     read: bool = False
     related_id: Optional[str] = None  # Business ID, Tag ID, Ticket ID etc.
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    id: str = field(default_factory=new_id)
+    created_at: datetime = field(default_factory=utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "title": self.title,
+            "message": self.message,
+            "priority": self.priority,
+            "read": self.read,
+            "related_id": self.related_id,
+            "created_at": self.created_at
+        }
 
 class SupportTicket(BaseModel):
     """Support ticket model"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     business_id: str
-    business_name: str
-    business_email: str
     subject: str
     description: str
-    status: TicketStatus = TicketStatus.OPEN
-    priority: TicketPriority = TicketPriority.MEDIUM
+    status: TicketStatusT = "open"
+    priority: TicketPriorityT = "medium"
     assigned_to: Optional[str] = None  # Admin ID
     admin_notes: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
     resolved_at: Optional[datetime] = None
 
-class DashboardStats(BaseModel):
+class SupportTicketWithBusiness(SupportTicket):
+    """Support ticket joined with its business, for list/detail responses"""
+    business_name: str
+    business_email: str
+
+@dataclass(slots=True, frozen=True)
+class DashboardStats:
     """Dashboard statistics"""
     total_businesses: int
     active_subscriptions: int
@@ -142,10 +213,25 @@ class DashboardStats(BaseModel):
     monthly_revenue: float
     pending_payments: int
 
+    def to_dict(self) -> dict:
+        return {
+            "total_businesses": self.total_businesses,
+            "active_subscriptions": self.active_subscriptions,
+            "total_tags": self.total_tags,
+            "available_tags": self.available_tags,
+            "assigned_tags": self.assigned_tags,
+            "gpt_usage_count": self.gpt_usage_count,
+            "gpt_cost": self.gpt_cost,
+            "total_revenue": self.total_revenue,
+            "monthly_revenue": self.monthly_revenue,
+            "pending_payments": self.pending_payments
+        }
+
 class BusinessUpdate(BaseModel):
     """Update business details"""
+    model_config = _CFG
     name: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     phone: Optional[str] = None
     address: Optional[str] = None
     category: Optional[str] = None
@@ -153,6 +239,7 @@ class BusinessUpdate(BaseModel):
 
 class TagAssignment(BaseModel):
     """Assign tag to business"""
+    model_config = _CFG
     tag_id: str
     business_id: str
     location: Optional[str] = None
@@ -160,8 +247,8 @@ class TagAssignment(BaseModel):
 
 class PromoCode(BaseModel):
     """Promotional code model"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     code: str
     discount_type: str  # percentage, fixed
     discount_value: float
@@ -170,12 +257,12 @@ class PromoCode(BaseModel):
     valid_from: datetime
     valid_until: datetime
     active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class PaymentGateway(BaseModel):
     """Payment gateway configuration"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     name: str  # e.g., "Razorpay India", "Razorpay Canada"
     gateway_type: str  # razorpay, stripe, etc.
     country: str  # IN, CA, US, etc.
@@ -184,68 +271,116 @@ class PaymentGateway(BaseModel):
     key_secret: str  # encrypted
     active: bool = True
     test_mode: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class AuditLog(BaseModel):
     """Audit trail for admin actions"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     admin_id: str
     admin_email: str
     action: str  # e.g., "business_created", "tag_assigned", "payment_updated"
     entity_type: str  # business, tag, payment, etc.
     entity_id: str
-    changes: dict  # Before/after data
+    changes: SkipValidation[dict]  # Before/after data, opaque to admin logic
     ip_address: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
+
+# Stored record shapes
+# Audit and history rows are write-mostly, so they are emitted as plain dicts
+
+class TagHistoryDoc(TypedDict):
+    """Tag history document as stored in tag_history"""
+    id: str
+    tag_id: str
+    action: str
+    business_id: Optional[str]
+    admin_id: str
+    admin_email: str
+    details: Optional[dict]
+    created_at: datetime
+
+class AuditLogDoc(TypedDict):
+    """Audit log document as stored in audit_logs"""
+    id: str
+    admin_id: str
+    admin_email: str
+    action: str
+    entity_type: str
+    entity_id: str
+    changes: dict
+    ip_address: Optional[str]
+    created_at: datetime
 
 # Request Models
 
 class AdminLoginRequest(BaseModel):
-    email: EmailStr
+    model_config = _CFG
+    email: str  # Checked against the admins collection, no format validation
     password: str
 
 class TagCreateRequest(BaseModel):
-    tag_type: TagType
+    model_config = _CFG
+    tag_type: TagTypeT
     tag_id: Optional[str] = None  # Optional, will auto-generate if not provided
-    quantity: int = 1  # For bulk creation
+    quantity: int = Field(default=1, ge=1)  # For bulk creation
 
 class TagBulkUpload(BaseModel):
     """Bulk upload tags"""
-    tag_type: TagType
+    model_config = _CFG
+    tag_type: TagTypeT
     tag_ids: List[str]  # List of tag IDs to upload
 
 class TagUnassign(BaseModel):
     """Unassign tag from business"""
+    model_config = _CFG
     tag_id: str
 
 class TagScrap(BaseModel):
     """Scrap a tag"""
+    model_config = _CFG
     tag_id: str
     reason: str
 
 class TagReset(BaseModel):
     """Reset a tag"""
+    model_config = _CFG
     tag_id: str
 
 class TicketCreate(BaseModel):
     """Create support ticket"""
+    model_config = _CFG
     business_id: str
     subject: str
     description: str
-    priority: Optional[TicketPriority] = TicketPriority.MEDIUM
+    priority: Optional[TicketPriorityT] = "medium"
 
 class TicketUpdate(BaseModel):
     """Update support ticket"""
-    status: Optional[TicketStatus] = None
-    priority: Optional[TicketPriority] = None
+    model_config = _CFG
+    status: Optional[TicketStatusT] = None
+    priority: Optional[TicketPriorityT] = None
     assigned_to: Optional[str] = None
     admin_notes: Optional[str] = None
 
 class PromoCodeCreate(BaseModel):
+    model_config = _CFG
     code: str
     discount_type: str
     discount_value: float
     max_uses: int = 0
     valid_from: datetime
     valid_until: datetime
+
+# Adapters built once at import and reused by list endpoints
+ResponseAdapter = TypeAdapter(dict)
+TagAdapter = TypeAdapter(Tag)
+TagListAdapter = TypeAdapter(List[Tag])
+AuditLogListAdapter = TypeAdapter(List[AuditLog])
+SupportTicketListAdapter = TypeAdapter(List[SupportTicket])
+
+# Adapters for small request bodies, validated straight from the raw JSON bytes
+AdminLoginRequestAdapter = TypeAdapter(AdminLoginRequest)
+TagAssignmentAdapter = TypeAdapter(TagAssignment)
+TagScrapAdapter = TypeAdapter(TagScrap)
+TicketUpdateAdapter = TypeAdapter(TicketUpdate)
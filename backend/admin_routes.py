@@ -1,14 +1,29 @@
 # Admin Routes - Complete API endpoints for admin panel
 
-from fastapi import APIRouter, HTTPException, Depends, Request, Header
+from fastapi import APIRouter, HTTPException, Depends, Request, Header, Response
+from fastapi.exceptions import RequestValidationError
 from admin_models import (
     AdminLoginRequest, BusinessUpdate, TagAssignment, TagCreateRequest,
-    TagBulkUpload, TagUnassign, TagScrap, TagReset,
-    PromoCodeCreate, AdminRole, BusinessStatus, TagStatus
+    TagBulkUpload, TagUnassign, TagScrap, TagReset, TicketUpdate, Tag,
+    PromoCodeCreate, AdminRole, BusinessStatus, TagStatus,
+    TagHistoryDoc, new_id, utcnow, TagAdapter, TagListAdapter, AuditLogListAdapter,
+    SupportTicketListAdapter, SupportTicketWithBusiness, ResponseAdapter, AdminLoginRequestAdapter,
+    TagAssignmentAdapter, TagScrapAdapter, TicketUpdateAdapter, TypeAdapter,
+    ValidationError
 )
-from admin_service import AdminService
+from admin_service import AdminService, invalidate_dashboard_stats, record_tag_history
+from business_cache import BUSINESS_PROJECTION, invalidate_business
+from notification_service import NotificationService
+from subscription_models import Coupon
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from cachetools import TTLCache
+import asyncio
 import bcrypt
+import hashlib
 import logging
+import os
+import re
 from datetime import datetime, timezone, timedelta
 
 logger = logging.getLogger(__name__)
@@ -19,32 +34,88 @@ def get_admin_service(request: Request) -> AdminService:
     """Dependency injection for admin service"""
     return AdminService(request.app.state.db)
 
+def get_notification_service(request: Request) -> NotificationService:
+    """Dependency injection for notification service (one stateless instance per app)"""
+    state = request.app.state
+    notif_service = getattr(state, "notification_service", None)
+    if notif_service is None:
+        notif_service = state.notification_service = NotificationService(state.db)
+    return notif_service
+
+# Verified admin tokens, keyed by SHA-256 of the token, so polling endpoints
+# skip the session + admin lookups. Only successful lookups are cached, never past
+# the session's own expiry; logout evicts the entry on this worker, and other
+# workers (and deactivated admins) drop out once ADMIN_TOKEN_TTL runs out
+ADMIN_TOKEN_TTL = 30  # seconds
+
+_admin_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=ADMIN_TOKEN_TTL)
+
+def _admin_token_key(token: str) -> bytes:
+    """Cache key for an admin token (its SHA-256, so raw tokens are not kept around)"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
 async def verify_admin(authorization: str = Header(None), service: AdminService = Depends(get_admin_service)):
     """Verify admin authentication"""
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.replace("Bearer ", "")
-    admin = await service.verify_admin_token(token)
-    
-    if not admin:
+    key = _admin_token_key(token)
+    cached = _admin_token_cache.get(key)
+    if cached is not None:
+        admin, expires_at = cached
+        if expires_at > datetime.now(timezone.utc):
+            return admin
+        _admin_token_cache.pop(key, None)
+    
+    session = await service.verify_admin_session(token)
+    if not session:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    _admin_token_cache[key] = session
     
-    return admin
+    return session[0]
+
+def json_body(adapter: TypeAdapter):
+    """Dependency that validates the raw request body in pydantic-core, skipping json.loads"""
+    async def parse_body(request: Request):
+        try:
+            return adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+    return parse_body
+
+def json_response(payload: dict, exclude_none: bool = True) -> Response:
+    """Serialize a response in pydantic-core, bypassing jsonable_encoder"""
+    return Response(
+        content=ResponseAdapter.dump_json(payload, exclude_none=exclude_none),
+        media_type="application/json"
+    )
 
 # Authentication
 
 @admin_router.post("/login")
-async def admin_login(request: AdminLoginRequest, service: AdminService = Depends(get_admin_service)):
+async def admin_login(
+    request: AdminLoginRequest = Depends(json_body(AdminLoginRequestAdapter)),
+    service: AdminService = Depends(get_admin_service)
+):
     """Admin login endpoint"""
+    # Cheap sanity check before hitting the database
+    if "@" not in request.email:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
     # Get admin by email
-    admin_doc = await service.db.admins.find_one({"email": request.email, "active": True}, {"_id": 0})
+    admin_doc = await service.db.admins.find_one(
+        {"email": request.email, "active": True},
+        {"_id": 0, "id": 1, "email": 1, "name": 1, "role": 1, "password_hash": 1}
+    )
     
     if not admin_doc:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    password_valid = bcrypt.checkpw(
+    # bcrypt is deliberately slow and releases the GIL; hash on a worker thread
+    password_valid = await asyncio.to_thread(
+        bcrypt.checkpw,
         request.password.encode('utf-8'),
         admin_doc['password_hash'].encode('utf-8')
     )
@@ -58,7 +129,7 @@ async def admin_login(request: AdminLoginRequest, service: AdminService = Depend
     # Update last login
     await service.db.admins.update_one(
         {"id": admin_doc['id']},
-        {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"last_login": datetime.now(timezone.utc)}}
     )
     
     return {
@@ -71,6 +142,19 @@ async def admin_login(request: AdminLoginRequest, service: AdminService = Depend
         }
     }
 
+@admin_router.post("/logout")
+async def admin_logout(
+    authorization: str = Header(None),
+    service: AdminService = Depends(get_admin_service)
+):
+    """End the admin session and drop its cached verification"""
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.replace("Bearer ", "")
+        _admin_token_cache.pop(_admin_token_key(token), None)
+        await service.db.admin_sessions.delete_one({"token": token})
+    
+    return {"success": True}
+
 @admin_router.get("/me")
 async def get_current_admin(admin = Depends(verify_admin)):
     """Get current admin info"""
@@ -81,6 +165,57 @@ async def get_current_admin(admin = Depends(verify_admin)):
         "role": admin.role
     }
 
+async def find_page(collection, query: dict, skip: int, limit: int, sort: dict = None,
+                    projection: dict = None) -> tuple:
+    """Fetch one page of matches and their total count in a single $facet round-trip"""
+    pipeline = [{"$match": query}]
+    if sort:
+        pipeline.append({"$sort": sort})
+    pipeline.append({"$facet": {
+        "items": [{"$skip": skip}, {"$limit": limit}, {"$project": projection or {"_id": 0}}],
+        "total": [{"$count": "n"}]
+    }})
+    result = (await collection.aggregate(pipeline).to_list(1))[0]
+    total = result["total"][0]["n"] if result["total"] else 0
+    return result["items"], total
+
+# Cursors carry created_at as epoch milliseconds, the precision of a BSON date;
+# rows still holding a legacy ISO string carry that string instead
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def keyset_filter(before: str = None) -> dict:
+    """Filter for rows older than a "millis|id" (or "iso|id") cursor from next_cursor()"""
+    if not before:
+        return {}
+    value, _, row_id = before.partition("|")
+    try:
+        created_at = EPOCH + timedelta(milliseconds=int(value))
+    except ValueError:
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # String bounds only match string rows, which sort after every date descending
+        return {"$or": [
+            {"created_at": {"$lt": value}},
+            {"created_at": value, "id": {"$lt": row_id}}
+        ]}
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": row_id}},
+        {"created_at": {"$type": "string"}}
+    ]}
+
+def next_cursor(rows: list, limit: int):
+    """Cursor for the page after rows, or None on the last page"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    if isinstance(last['created_at'], str):
+        return f"{last['created_at']}|{last['id']}"
+    millis = (last['created_at'] - EPOCH) // timedelta(milliseconds=1)
+    return f"{millis}|{last['id']}"
+
 # Dashboard
 
 @admin_router.get("/dashboard/stats")
@@ -90,17 +225,18 @@ async def get_dashboard_stats(
 ):
     """Get dashboard statistics"""
     stats = await service.get_dashboard_stats()
-    return stats.model_dump()
+    return stats.to_dict()
 
 @admin_router.get("/dashboard/notifications")
 async def get_notifications(
     limit: int = 50,
+    before: str = None,
     admin = Depends(verify_admin),
     service: AdminService = Depends(get_admin_service)
 ):
-    """Get system notifications"""
-    notifications = await service.get_notifications(limit)
-    return {"notifications": notifications}
+    """Get system notifications, newest first; pass next_cursor as before for older ones"""
+    notifications = await service.get_notifications(limit, keyset_filter(before))
+    return {"notifications": notifications, "next_cursor": next_cursor(notifications, limit)}
 
 @admin_router.post("/dashboard/notifications/{notification_id}/read")
 async def mark_notification_read(
@@ -121,14 +257,10 @@ async def mark_notification_read(
 async def get_recent_notifications(
     limit: int = 10,
     admin = Depends(verify_admin),
-    service: AdminService = Depends(get_admin_service)
+    notif_service: NotificationService = Depends(get_notification_service)
 ):
     """Get recent notifications with unread count"""
-    from notification_service import NotificationService
-    notif_service = NotificationService(service.db)
-    
-    notifications = await notif_service.get_notifications(limit=limit)
-    unread_count = await notif_service.get_unread_count()
+    notifications, unread_count = await notif_service.get_recent_with_count(limit)
     
     return {
         "notifications": notifications,
@@ -139,12 +271,9 @@ async def get_recent_notifications(
 async def mark_notifications_read(
     request: Request,
     admin = Depends(verify_admin),
-    service: AdminService = Depends(get_admin_service)
+    notif_service: NotificationService = Depends(get_notification_service)
 ):
     """Mark multiple notifications as read"""
-    from notification_service import NotificationService
-    notif_service = NotificationService(service.db)
-    
     data = await request.json()
     notification_ids = data.get("notification_ids", [])
     
@@ -154,36 +283,27 @@ async def mark_notifications_read(
 @admin_router.post("/notifications/mark-all-read")
 async def mark_all_notifications_read(
     admin = Depends(verify_admin),
-    service: AdminService = Depends(get_admin_service)
+    notif_service: NotificationService = Depends(get_notification_service)
 ):
     """Mark all notifications as read"""
-    from notification_service import NotificationService
-    notif_service = NotificationService(service.db)
-    
     await notif_service.mark_all_as_read()
     return {"success": True}
 
 @admin_router.get("/notifications/badges")
 async def get_notification_badges(
     admin = Depends(verify_admin),
-    service: AdminService = Depends(get_admin_service)
+    notif_service: NotificationService = Depends(get_notification_service)
 ):
     """Get notification badge counts for tabs"""
-    from notification_service import NotificationService
-    notif_service = NotificationService(service.db)
-    
     badges = await notif_service.get_notification_badges()
     return badges
 
 @admin_router.get("/businesses/alerts")
 async def get_business_alerts(
     admin = Depends(verify_admin),
-    service: AdminService = Depends(get_admin_service)
+    notif_service: NotificationService = Depends(get_notification_service)
 ):
     """Get all business alerts with color coding"""
-    from notification_service import NotificationService
-    notif_service = NotificationService(service.db)
-    
     alerts = await notif_service.get_business_alerts()
     return {"alerts": alerts}
 
@@ -201,33 +321,28 @@ async def list_businesses(
 ):
     """List all businesses with filters"""
     query = {}
+    sort = None
     
     if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}},
-            {"phone": {"$regex": search, "$options": "i"}}
-        ]
+        # Served by the biz_text index; matches whole words, ranked by relevance
+        query["$text"] = {"$search": search}
+        sort = {"score": {"$meta": "textScore"}}
     
     if status:
         query["subscription_status"] = status
     
     if city:
-        query["address"] = {"$regex": city, "$options": "i"}
-    
-    businesses = await service.db.businesses.find(
-        query,
-        {"_id": 0}
-    ).skip(skip).limit(limit).to_list(limit)
+        # City sits anywhere in the address, in any case; escaped so it matches literally
+        query["address"] = {"$regex": re.escape(city), "$options": "i"}
     
-    total = await service.db.businesses.count_documents(query)
+    businesses, total = await find_page(service.db.businesses, query, skip, limit, sort, BUSINESS_PROJECTION)
     
-    return {
+    return json_response({
         "businesses": businesses,
         "total": total,
         "skip": skip,
         "limit": limit
-    }
+    })
 
 @admin_router.get("/businesses/{business_id}")
 async def get_business_detail(
@@ -236,20 +351,19 @@ async def get_business_detail(
     service: AdminService = Depends(get_admin_service)
 ):
     """Get detailed business profile with analytics"""
-    business = await service.db.businesses.find_one({"id": business_id}, {"_id": 0})
+    # Business, analytics and tags are independent lookups; run them concurrently
+    business, analytics, tags = await asyncio.gather(
+        service.db.businesses.find_one({"id": business_id}, BUSINESS_PROJECTION),
+        service.get_business_analytics(business_id),
+        service.db.tags.find(
+            {"business_id": business_id},
+            {"_id": 0}
+        ).to_list(100)
+    )
     
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
-    # Get analytics
-    analytics = await service.get_business_analytics(business_id)
-    
-    # Get tags
-    tags = await service.db.tags.find(
-        {"business_id": business_id},
-        {"_id": 0}
-    ).to_list(100)
-    
     return {
         "business": business,
         "analytics": analytics,
@@ -265,26 +379,28 @@ async def update_business(
     service: AdminService = Depends(get_admin_service)
 ):
     """Update business details"""
-    # Get current business
-    business = await service.db.businesses.find_one({"id": business_id}, {"_id": 0})
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-    
     # Prepare update data
-    update_data = {k: v for k, v in update.model_dump().items() if v is not None}
+    update_data = update.model_dump(mode="json", exclude_none=True)
     
     # Map 'status' to 'subscription_status' for the database
     if 'status' in update_data:
         update_data['subscription_status'] = update_data.pop('status')
     
     if not update_data:
+        if not await service.db.businesses.find_one({"id": business_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Business not found")
         return {"success": True, "message": "No changes"}
     
-    # Update business
-    await service.db.businesses.update_one(
+    # Update business, getting the prior values of the changed fields in the same round-trip
+    business = await service.db.businesses.find_one_and_update(
         {"id": business_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "id": 1, **{field: 1 for field in update_data}},
+        return_document=ReturnDocument.BEFORE
     )
+    if not business:
+        raise HTTPException(status_code=404, detail="Business not found")
+    invalidate_business(business_id)
     
     # Log action
     await service.log_admin_action(
@@ -306,7 +422,7 @@ async def delete_business(
     service: AdminService = Depends(get_admin_service)
 ):
     """Delete business (soft delete by setting inactive)"""
-    business = await service.db.businesses.find_one({"id": business_id}, {"_id": 0})
+    business = await service.db.businesses.find_one({"id": business_id}, {"_id": 0, "id": 1})
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
@@ -315,6 +431,7 @@ async def delete_business(
         {"id": business_id},
         {"$set": {"subscription_status": "suspended"}}
     )
+    invalidate_business(business_id)
     
     # Log action
     await service.log_admin_action(
@@ -332,20 +449,57 @@ async def delete_business(
 
 # Tag Management
 
+def tag_history_doc(tag_id: str, action: str, admin, business_id: str = None, details: dict = None) -> TagHistoryDoc:
+    """Build a tag_history row"""
+    return {
+        "id": new_id(),
+        "tag_id": tag_id,
+        "action": action,
+        "business_id": business_id,
+        "admin_id": admin.id,
+        "admin_email": admin.email,
+        "details": details,
+        "created_at": utcnow()
+    }
+
 async def log_tag_history(db, tag_id: str, action: str, admin, business_id: str = None, details: dict = None):
-    """Helper to log tag history"""
-    from admin_models import TagHistory
-    history = TagHistory(
-        tag_id=tag_id,
-        action=action,
-        business_id=business_id,
-        admin_id=admin.id,
-        admin_email=admin.email,
-        details=details
+    """Helper to log tag history (queued, written in the background)"""
+    # Every tag mutation is logged here, so this is where cached tag counts go stale
+    invalidate_dashboard_stats()
+    record_tag_history(tag_history_doc(tag_id, action, admin, business_id, details))
+
+async def insert_new_tags(db, tag_docs: list, admin) -> set:
+    """Insert tags and their "created" history as two concurrent batched writes.
+    
+    Returns the tag_ids rejected by the unique tag_id index (created concurrently).
+    """
+    history_docs = [tag_history_doc(doc["tag_id"], "created", admin) for doc in tag_docs]
+    tags_result, history_result = await asyncio.gather(
+        db.tags.insert_many(tag_docs, ordered=False),
+        db.tag_history.insert_many(history_docs, ordered=False),
+        return_exceptions=True
     )
-    history_doc = history.model_dump()
-    history_doc['created_at'] = history_doc['created_at'].isoformat()
-    await db.tag_history.insert_one(history_doc)
+    
+    duplicates = set()
+    if isinstance(tags_result, BulkWriteError):
+        write_errors = tags_result.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in write_errors):
+            raise tags_result
+        duplicates = {tag_docs[err["index"]]["tag_id"] for err in write_errors}
+    elif isinstance(tags_result, Exception):
+        raise tags_result
+    
+    if isinstance(history_result, Exception):
+        raise history_result
+    
+    # History went out alongside the tags; drop the rows for tags that were rejected
+    if duplicates:
+        await db.tag_history.delete_many({
+            "id": {"$in": [h["id"] for h in history_docs if h["tag_id"] in duplicates]}
+        })
+    
+    invalidate_dashboard_stats()
+    return duplicates
 
 @admin_router.post("/tags/create")
 async def create_tags(
@@ -354,34 +508,51 @@ async def create_tags(
     service: AdminService = Depends(get_admin_service)
 ):
     """Create new tags"""
-    import uuid
-    from admin_models import Tag
+    # Generate all tag IDs up front
+    if request.tag_id and request.quantity == 1:
+        tag_ids = [request.tag_id]
+    else:
+        prefix = request.tag_type.upper()
+        # One urandom call for the whole batch; 4 random bytes (8 hex chars) per tag
+        raw = os.urandom(4 * request.quantity).hex().upper()
+        tag_ids = [f"{prefix}-{raw[i:i + 8]}" for i in range(0, len(raw), 8)]
+    
+    # Check every ID in one round-trip
+    existing = await service.db.tags.distinct("tag_id", {"tag_id": {"$in": tag_ids}})
+    if existing:
+        raise HTTPException(status_code=400, detail=f"Tag ID {existing[0]} already exists")
     
+    now = utcnow()
     created_tags = []
     
-    for i in range(request.quantity):
-        # Generate tag ID if not provided
-        tag_id = request.tag_id if request.tag_id and request.quantity == 1 else f"{request.tag_type.upper()}-{uuid.uuid4().hex[:8].upper()}"
-        
-        # Check if tag ID already exists
-        existing = await service.db.tags.find_one({"tag_id": tag_id}, {"_id": 0})
-        if existing:
-            raise HTTPException(status_code=400, detail=f"Tag ID {tag_id} already exists")
-        
+    for tag_id in tag_ids:
+        # Inputs were validated by the request model; Tag itself is not validated
         tag = Tag(
             tag_type=request.tag_type,
             tag_id=tag_id,
-            status=TagStatus.INACTIVE
+            status=TagStatus.INACTIVE,
+            created_at=now
         )
         
-        tag_doc = tag.model_dump()
-        tag_doc['created_at'] = tag_doc['created_at'].isoformat()
-        
-        await service.db.tags.insert_one(tag_doc)
+        tag_doc = TagAdapter.dump_python(tag)
         created_tags.append(tag_doc)
-        
-        # Log history
-        await log_tag_history(service.db, tag_id, "created", admin)
+    
+    duplicates = await insert_new_tags(service.db, created_tags, admin)
+    if duplicates:
+        # Another request took one of the IDs meanwhile; undo the rest so the batch
+        # is all-or-nothing, like the up-front check above
+        inserted = [doc["tag_id"] for doc in created_tags if doc["tag_id"] not in duplicates]
+        if inserted:
+            await asyncio.gather(
+                service.db.tags.delete_many({"tag_id": {"$in": inserted}}),
+                service.db.tag_history.delete_many({"tag_id": {"$in": inserted}})
+            )
+            invalidate_dashboard_stats()
+        raise HTTPException(status_code=400, detail=f"Tag ID {next(iter(duplicates))} already exists")
+    
+    # insert_many adds the ObjectId to each document; keep it out of the response
+    for tag_doc in created_tags:
+        tag_doc.pop("_id", None)
     
     return {
         "success": True,
@@ -396,32 +567,41 @@ async def bulk_upload_tags(
     service: AdminService = Depends(get_admin_service)
 ):
     """Bulk upload tags"""
-    from admin_models import Tag
+    # One lookup for every ID already in use
+    existing = {
+        doc["tag_id"] async for doc in service.db.tags.find(
+            {"tag_id": {"$in": request.tag_ids}},
+            {"_id": 0, "tag_id": 1}
+        )
+    }
     
     created_tags = []
     skipped_tags = []
+    seen = set()
+    now = utcnow()
     
     for tag_id in request.tag_ids:
-        # Check if tag ID already exists
-        existing = await service.db.tags.find_one({"tag_id": tag_id}, {"_id": 0})
-        if existing:
+        if tag_id in existing or tag_id in seen:
             skipped_tags.append(tag_id)
             continue
+        seen.add(tag_id)
         
+        # Inputs were validated by the request model; Tag itself is not validated
         tag = Tag(
             tag_type=request.tag_type,
             tag_id=tag_id,
-            status=TagStatus.INACTIVE
+            status=TagStatus.INACTIVE,
+            created_at=now
         )
         
-        tag_doc = tag.model_dump()
-        tag_doc['created_at'] = tag_doc['created_at'].isoformat()
-        
-        await service.db.tags.insert_one(tag_doc)
+        tag_doc = TagAdapter.dump_python(tag)
         created_tags.append(tag_doc)
-        
-        # Log history
-        await log_tag_history(service.db, tag_id, "created", admin)
+    
+    if created_tags:
+        duplicates = await insert_new_tags(service.db, created_tags, admin)
+        if duplicates:
+            skipped_tags.extend(duplicates)
+            created_tags = [doc for doc in created_tags if doc["tag_id"] not in duplicates]
     
     return {
         "success": True,
@@ -448,22 +628,20 @@ async def list_tags(
     if business_id:
         query["business_id"] = business_id
     
-    tags = await service.db.tags.find(
-        query,
-        {"_id": 0}
-    ).skip(skip).limit(limit).to_list(limit)
-    
-    total = await service.db.tags.count_documents(query)
+    rows, total = await find_page(service.db.tags, query, skip, limit)
+    tags = TagListAdapter.validate_python(rows)
     
-    return {
-        "tags": tags,
+    # Tag is a dataclass, which the untyped response adapter dumps field by field
+    # without honouring exclude_none; drop its None fields through its own adapter
+    return json_response({
+        "tags": TagListAdapter.dump_python(tags, exclude_none=True),
         "total": total
-    }
+    })
 
 @admin_router.post("/tags/assign")
 async def assign_tag(
-    assignment: TagAssignment,
     request: Request,
+    assignment: TagAssignment = Depends(json_body(TagAssignmentAdapter)),
     admin = Depends(verify_admin),
     service: AdminService = Depends(get_admin_service)
 ):
@@ -477,7 +655,7 @@ async def assign_tag(
         raise HTTPException(status_code=400, detail=f"Tag is {tag['status']}, can only assign inactive tags")
     
     # Verify business exists
-    business = await service.db.businesses.find_one({"id": assignment.business_id}, {"_id": 0})
+    business = await service.db.businesses.count_documents({"id": assignment.business_id}, limit=1)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
@@ -490,8 +668,8 @@ async def assign_tag(
         {"$set": {
             "status": TagStatus.PENDING,
             "business_id": assignment.business_id,
-            "assigned_at": now.isoformat(),
-            "expires_at": expires_at.isoformat(),
+            "assigned_at": now,
+            "expires_at": expires_at,
             "location": assignment.location
         }}
     )
@@ -526,19 +704,9 @@ async def unassign_tag(
     service: AdminService = Depends(get_admin_service)
 ):
     """Unassign/revoke tag from business"""
-    # Verify tag exists
-    tag = await service.db.tags.find_one({"tag_id": request_data.tag_id}, {"_id": 0})
-    if not tag:
-        raise HTTPException(status_code=404, detail="Tag not found")
-    
-    if not tag.get('business_id'):
-        raise HTTPException(status_code=400, detail="Tag is not assigned to any business")
-    
-    old_business_id = tag['business_id']
-    
-    # Unassign tag
-    await service.db.tags.update_one(
-        {"tag_id": request_data.tag_id},
+    # Unassign tag only if it is assigned, getting the prior state atomically
+    tag = await service.db.tags.find_one_and_update(
+        {"tag_id": request_data.tag_id, "business_id": {"$nin": [None, ""]}},
         {"$set": {
             "status": TagStatus.INACTIVE,
             "business_id": None,
@@ -546,8 +714,16 @@ async def unassign_tag(
             "activated_at": None,
             "expires_at": None,
             "location": None
-        }}
+        }},
+        projection={"_id": 0, "id": 1, "business_id": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    if not tag:
+        if not await service.db.tags.find_one({"tag_id": request_data.tag_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Tag not found")
+        raise HTTPException(status_code=400, detail="Tag is not assigned to any business")
+    
+    old_business_id = tag['business_id']
     
     # Log history
     await log_tag_history(
@@ -573,8 +749,8 @@ async def unassign_tag(
 
 @admin_router.post("/tags/scrap")
 async def scrap_tag(
-    request_data: TagScrap,
     request: Request,
+    request_data: TagScrap = Depends(json_body(TagScrapAdapter)),
     admin = Depends(verify_admin),
     service: AdminService = Depends(get_admin_service)
 ):
@@ -594,7 +770,7 @@ async def scrap_tag(
         {"$set": {
             "status": TagStatus.SCRAPPED,
             "scrap_reason": request_data.reason,
-            "scrapped_at": now.isoformat(),
+            "scrapped_at": now,
             "business_id": None,
             "assigned_at": None,
             "activated_at": None,
@@ -678,16 +854,18 @@ async def reset_tag(
 @admin_router.get("/tags/{tag_id}/history")
 async def get_tag_history(
     tag_id: str,
+    before: str = None,
+    limit: int = 100,
     admin = Depends(verify_admin),
     service: AdminService = Depends(get_admin_service)
 ):
-    """Get tag activation history"""
+    """Get tag activation history, newest first; pass next_cursor as before for older entries"""
     history = await service.db.tag_history.find(
-        {"tag_id": tag_id},
+        {"tag_id": tag_id, **keyset_filter(before)},
         {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+    ).sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit)
     
-    return {"history": history}
+    return {"history": history, "next_cursor": next_cursor(history, limit)}
 
 # Promo Codes
 
@@ -698,7 +876,7 @@ async def list_promo_codes(
 ):
     """List all promo codes"""
     promos = await service.db.coupons.find({}, {"_id": 0}).to_list(100)
-    return {"promo_codes": promos}
+    return json_response({"promo_codes": promos})
 
 @admin_router.post("/promo-codes")
 async def create_promo_code(
@@ -708,13 +886,6 @@ async def create_promo_code(
     service: AdminService = Depends(get_admin_service)
 ):
     """Create new promo code"""
-    # Check if code already exists
-    existing = await service.db.coupons.find_one({"code": promo.code.upper()}, {"_id": 0})
-    if existing:
-        raise HTTPException(status_code=400, detail="Promo code already exists")
-    
-    from subscription_models import Coupon
-    
     coupon = Coupon(
         code=promo.code.upper(),
         discount_type=promo.discount_type,
@@ -725,11 +896,13 @@ async def create_promo_code(
     )
     
     coupon_doc = coupon.model_dump()
-    coupon_doc['valid_from'] = coupon_doc['valid_from'].isoformat()
-    coupon_doc['valid_until'] = coupon_doc['valid_until'].isoformat()
-    coupon_doc['created_at'] = coupon_doc['created_at'].isoformat()
     
-    await service.db.coupons.insert_one(coupon_doc)
+    # Uniqueness is enforced by the coupons.code index
+    try:
+        await service.db.coupons.insert_one(coupon_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Promo code already exists")
+    coupon_doc.pop("_id", None)
     
     # Log action
     await service.log_admin_action(
@@ -747,21 +920,29 @@ async def create_promo_code(
 
 @admin_router.get("/audit-logs")
 async def get_audit_logs(
-    skip: int = 0,
+    before: str = None,
     limit: int = 50,
     admin = Depends(verify_admin),
     service: AdminService = Depends(get_admin_service)
 ):
-    """Get audit logs"""
-    logs = await service.db.audit_logs.find(
-        {},
+    """Get audit logs, newest first; pass next_cursor as before for the next page"""
+    rows = await service.db.audit_logs.find(
+        keyset_filter(before),
         {"_id": 0}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    ).sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit)
+    logs = AuditLogListAdapter.validate_python(rows)
     
-    return {"logs": logs}
+    return json_response({"logs": logs, "next_cursor": next_cursor(rows, limit)})
 
 # Support Tickets Management
 
+def business_contact(business: dict) -> dict:
+    """Name/email shown alongside a ticket"""
+    return {
+        "business_name": business.get('name', 'Unknown'),
+        "business_email": business.get('owner_email') or business.get('email', '')
+    }
+
 @admin_router.get("/tickets")
 async def list_tickets(
     status: str = None,
@@ -780,23 +961,36 @@ async def list_tickets(
     if priority:
         query["priority"] = priority
     
-    tickets = await service.db.support_tickets.find(
-        query,
-        {"_id": 0}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    total = await service.db.support_tickets.count_documents(query)
-    
-    # Get counts by status
-    open_count = await service.db.support_tickets.count_documents({"status": "open"})
-    pending_count = await service.db.support_tickets.count_documents({"status": "pending"})
+    # Page, total and the open/pending badges as concurrent index-backed queries
+    # (a $facet without a leading $match would scan the whole collection)
+    rows, total, open_count, pending_count = await asyncio.gather(
+        service.db.support_tickets.find(query, {"_id": 0})
+            .sort("created_at", -1).skip(skip).limit(limit).to_list(limit),
+        service.db.support_tickets.count_documents(query),
+        service.db.support_tickets.count_documents({"status": "open"}),
+        service.db.support_tickets.count_documents({"status": "pending"})
+    )
+    tickets = SupportTicketListAdapter.validate_python(rows)
     
-    return {
+    # Join business name/email with one lookup for the whole page
+    business_ids = list({t.business_id for t in tickets})
+    businesses = await service.db.businesses.find(
+        {"id": {"$in": business_ids}},
+        {"_id": 0, "id": 1, "name": 1, "owner_email": 1, "email": 1}
+    ).to_list(None)
+    contacts = {b['id']: business_contact(b) for b in businesses}
+    missing = business_contact({})
+    tickets = [
+        SupportTicketWithBusiness.model_construct(**dict(t), **contacts.get(t.business_id, missing))
+        for t in tickets
+    ]
+    
+    return json_response({
         "tickets": tickets,
         "total": total,
         "open_count": open_count,
         "pending_count": pending_count
-    }
+    })
 
 @admin_router.get("/tickets/{ticket_id}")
 async def get_ticket_detail(
@@ -809,32 +1003,44 @@ async def get_ticket_detail(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
+    business = await service.db.businesses.find_one(
+        {"id": ticket['business_id']},
+        {"_id": 0, "name": 1, "owner_email": 1, "email": 1}
+    )
+    ticket.update(business_contact(business or {}))
+    
     return ticket
 
 @admin_router.put("/tickets/{ticket_id}")
 async def update_ticket(
     ticket_id: str,
-    update: dict,
     request: Request,
+    update: TicketUpdate = Depends(json_body(TicketUpdateAdapter)),
     admin = Depends(verify_admin),
     service: AdminService = Depends(get_admin_service)
 ):
     """Update ticket status/priority/notes"""
-    ticket = await service.db.support_tickets.find_one({"id": ticket_id}, {"_id": 0})
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    # Only fields the client actually sent
+    update_data = update.model_dump(mode="json", exclude_unset=True, exclude_none=True)
+    if not update_data:
+        if not await service.db.support_tickets.find_one({"id": ticket_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return {"success": True, "message": "No changes"}
     
-    update_data = {k: v for k, v in update.items() if v is not None}
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    now = utcnow()
+    update_data['updated_at'] = now
     
     # If marking as resolved, set resolved_at
     if update_data.get('status') == 'resolved':
-        update_data['resolved_at'] = datetime.now(timezone.utc).isoformat()
+        update_data['resolved_at'] = now
     
-    await service.db.support_tickets.update_one(
+    ticket = await service.db.support_tickets.find_one_and_update(
         {"id": ticket_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "id": 1}
     )
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
     
     # Log action
     await service.log_admin_action(
@@ -2,18 +2,170 @@
 # Handles all admin operations with proper validation and error handling
 
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import logging
 import hashlib
 import secrets
+from cachetools import TTLCache
 from admin_models import (
     Admin, AdminSession, Tag, TagStatus, TagType, Notification,
-    NotificationType, DashboardStats, BusinessStatus, AuditLog
+    NotificationType, DashboardStats, BusinessStatus, AuditLogDoc, TagHistoryDoc,
+    new_id, utcnow
 )
 
 logger = logging.getLogger(__name__)
 
+# Audit log and tag history rows are queued by request handlers and written
+# in batches, so the admin trail never adds a round-trip to a response
+AUDIT_QUEUE_SIZE = 20_000
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL = 0.05  # seconds
+
+# Items are (collection name, document)
+_audit_queue: "asyncio.Queue[Tuple[str, dict]]" = asyncio.Queue(maxsize=AUDIT_QUEUE_SIZE)
+
+def _enqueue(collection: str, doc: dict, label: str) -> None:
+    try:
+        _audit_queue.put_nowait((collection, doc))
+    except asyncio.QueueFull:
+        logger.warning(f"Audit queue full, dropping {collection} row: {label}")
+
+def record_audit(log_doc: AuditLogDoc) -> None:
+    """Queue an audit log row without blocking; drops it if the queue is full"""
+    _enqueue("audit_logs", log_doc, f"{log_doc['action']} - {log_doc['entity_type']}:{log_doc['entity_id']}")
+
+def record_tag_history(history_doc: TagHistoryDoc) -> None:
+    """Queue a tag history row without blocking; drops it if the queue is full"""
+    _enqueue("tag_history", history_doc, f"{history_doc['action']} - {history_doc['tag_id']}")
+
+async def _insert_audit_batch(db, batch: List[Tuple[str, dict]]):
+    by_collection: Dict[str, List[dict]] = {}
+    for collection, doc in batch:
+        by_collection.setdefault(collection, []).append(doc)
+    
+    for collection, docs in by_collection.items():
+        try:
+            await db[collection].insert_many(docs, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to write {len(docs)} {collection} rows: {str(e)}")
+
+# Dashboard stats are recomputed at most once per TTL window per process;
+# tag mutations invalidate the cached copy so stock counts stay current
+DASHBOARD_STATS_TTL = 30  # seconds
+
+_dashboard_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=DASHBOARD_STATS_TTL)
+
+def invalidate_dashboard_stats() -> None:
+    """Drop the cached dashboard stats so the next request recomputes them"""
+    _dashboard_stats_cache.clear()
+
+# Indexes backing the admin, dashboard and analytics queries: (collection, keys, create_index options)
+ADMIN_INDEXES = [
+    ("businesses", [("name", "text"), ("email", "text"), ("phone", "text")],
+     {"weights": {"name": 10, "email": 5, "phone": 5}, "name": "biz_text"}),
+    ("businesses", [("address", 1)], {}),
+    ("businesses", [("id", 1)], {"unique": True}),
+    ("businesses", [("created_at", -1)], {}),
+    ("businesses", [("subscription_expires_at", 1)], {}),
+    ("business_tags", [("status", 1)], {}),
+    ("tags", [("tag_id", 1)], {"unique": True}),
+    ("tags", [("id", 1)], {"unique": True}),
+    ("tags", [("status", 1), ("expires_at", 1)], {}),
+    ("tags", [("business_id", 1), ("status", 1)], {}),
+    ("payments", [("status", 1), ("completed_at", 1)], {}),
+    ("payments", [("business_id", 1), ("status", 1), ("completed_at", -1)], {}),
+    ("payments", [("razorpay_order_id", 1)],
+     {"unique": True, "partialFilterExpression": {"razorpay_order_id": {"$type": "string"}}}),
+    ("subscriptions", [("business_id", 1), ("expiry_date", -1)], {}),
+    ("subscriptions", [("status", 1), ("expiry_date", 1)], {}),
+    ("subscriptions", [("expired_at", 1)], {"sparse": True}),
+    ("reviews", [("business_id", 1)], {}),
+    ("admins", [("id", 1), ("active", 1)], {}),
+    ("tag_history", [("tag_id", 1), ("created_at", -1), ("id", -1)], {}),
+    ("audit_logs", [("created_at", -1), ("id", -1)], {}),
+    ("notifications", [("created_at", -1), ("id", -1)], {}),
+    ("admin_notifications", [("created_at", -1)], {}),
+    ("admin_notifications", [("is_read", 1), ("created_at", -1)], {}),
+    ("admin_notifications", [("type", 1), ("business_id", 1), ("created_at", -1)], {}),
+    ("admin_notifications", [("type", 1), ("related_id", 1)], {}),
+    ("support_tickets", [("created_at", -1)], {}),
+    ("support_tickets", [("status", 1), ("created_at", -1)], {}),
+    ("support_tickets", [("priority", 1), ("created_at", -1)], {}),
+    ("coupons", [("code", 1)], {"unique": True}),
+    ("users", [("email", 1)], {"unique": True}),
+    ("users", [("id", 1)], {}),
+    ("admin_sessions", [("token", 1)], {"unique": True}),
+    ("admin_sessions", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ("user_sessions", [("session_token", 1), ("expires_at", 1)], {}),
+    ("user_sessions", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+async def ensure_indexes(db):
+    """Create the admin indexes if missing (called once at startup)"""
+    for collection, keys, options in ADMIN_INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            logger.error(f"Failed to create index on {collection} {keys}: {str(e)}")
+
+async def audit_flusher(db):
+    """Background task: write queued rows with one insert_many per collection per batch.
+    
+    When cancelled, rows already taken off the queue are still written before it exits.
+    """
+    loop = asyncio.get_running_loop()
+    batch = []
+    writing = None
+    try:
+        while True:
+            batch.append(await _audit_queue.get())
+            deadline = loop.time() + AUDIT_FLUSH_INTERVAL
+            
+            # Collect more rows until the batch is full or the flush window closes
+            while len(batch) < AUDIT_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_audit_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Shielded so cancellation cannot stop a batch halfway through its inserts
+            writing = asyncio.ensure_future(_insert_audit_batch(db, batch))
+            batch = []
+            await asyncio.shield(writing)
+    except asyncio.CancelledError:
+        if writing is not None:
+            await writing
+        if batch:
+            await _insert_audit_batch(db, batch)
+        raise
+
+async def flush_audit_queue(db):
+    """Write any audit rows still queued (used on shutdown)"""
+    batch = []
+    while not _audit_queue.empty():
+        batch.append(_audit_queue.get_nowait())
+    if batch:
+        await _insert_audit_batch(db, batch)
+
+async def stop_audit_flusher(flusher: asyncio.Task, db):
+    """Cancel the flusher, wait for the rows it holds, then drain the queue (on shutdown)"""
+    flusher.cancel()
+    await asyncio.gather(flusher, return_exceptions=True)
+    await flush_audit_queue(db)
+
+# Only the fields the Admin model holds; skips anything else stored on the document
+ADMIN_PROJECTION = {"_id": 0, **{field: 1 for field in Admin.model_fields}}
+
+def _facet_value(facets: dict, key: str):
+    """Single "n" value from a $count/$group facet branch, 0 when it matched nothing"""
+    branch = facets[key]
+    return branch[0]["n"] if branch else 0
+
 class AdminService:
     """Service class for admin operations"""
     
@@ -31,80 +183,89 @@ class AdminService:
             expires_at=expires_at
         )
         
+        # Timestamps stay BSON dates; the TTL index purges expired sessions
         session_doc = session.model_dump()
-        session_doc['expires_at'] = session_doc['expires_at'].isoformat()
-        session_doc['created_at'] = session_doc['created_at'].isoformat()
         
         await self.db.admin_sessions.insert_one(session_doc)
         return token
     
     async def verify_admin_token(self, token: str) -> Optional[Admin]:
         """Verify admin session token"""
-        session = await self.db.admin_sessions.find_one(
-            {"token": token},
-            {"_id": 0}
-        )
-        
-        if not session:
-            return None
-        
-        # Check expiry
-        if isinstance(session.get('expires_at'), str):
-            expires_at = datetime.fromisoformat(session['expires_at'])
-        else:
-            expires_at = session['expires_at']
-        
-        if expires_at <= datetime.now(timezone.utc):
-            return None
-        
-        # Get admin
-        admin = await self.db.admins.find_one(
-            {"id": session['admin_id'], "active": True},
-            {"_id": 0}
-        )
+        session = await self.verify_admin_session(token)
+        return session[0] if session else None
+    
+    async def verify_admin_session(self, token: str) -> Optional[Tuple[Admin, datetime]]:
+        """Active admin and session expiry for an unexpired session token"""
+        # Unexpired session joined with its active admin in one round-trip
+        rows = await self.db.admin_sessions.aggregate([
+            {"$match": {"token": token, "expires_at": {"$gt": datetime.now(timezone.utc)}}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "admins",
+                "localField": "admin_id",
+                "foreignField": "id",
+                "pipeline": [{"$match": {"active": True}}, {"$project": ADMIN_PROJECTION}],
+                "as": "admin"
+            }},
+            {"$unwind": "$admin"},
+            {"$replaceWith": {"$mergeObjects": ["$admin", {"session_expires_at": "$expires_at"}]}}
+        ]).to_list(1)
         
-        if not admin:
+        if not rows:
             return None
         
-        return Admin(**admin)
+        # Admin ignores the extra session_expires_at key
+        return Admin(**rows[0]), rows[0]["session_expires_at"]
     
     async def get_dashboard_stats(self) -> DashboardStats:
+        """Dashboard statistics, served from the short-lived cache when fresh"""
+        stats = _dashboard_stats_cache.get("stats")
+        if stats is None:
+            stats = await self._compute_dashboard_stats()
+            _dashboard_stats_cache["stats"] = stats
+        return stats
+    
+    async def _compute_dashboard_stats(self) -> DashboardStats:
         """Calculate dashboard statistics"""
-        # Total businesses
-        total_businesses = await self.db.businesses.count_documents({})
-        
-        # Active subscriptions
-        now = datetime.now(timezone.utc).isoformat()
-        active_subscriptions = await self.db.subscriptions.count_documents({
-            "status": "active",
-            "expiry_date": {"$gt": now}
-        })
-        
-        # Tags
-        total_tags = await self.db.tags.count_documents({})
-        available_tags = await self.db.tags.count_documents({"status": TagStatus.INACTIVE})
-        assigned_tags = await self.db.tags.count_documents({"status": {"$in": [TagStatus.PENDING, TagStatus.ACTIVE]}})
-        
-        # GPT usage (count reviews generated)
-        gpt_usage = await self.db.reviews.count_documents({})
-        # Estimate cost: ~$0.0002 per review
-        gpt_cost = gpt_usage * 0.0002
+        now = datetime.now(timezone.utc)
+        month_ago = now - timedelta(days=30)
         
-        # Revenue
-        payments = await self.db.payments.find(
-            {"status": "completed"},
-            {"_id": 0, "amount": 1, "completed_at": 1}
-        ).to_list(10000)
+        # Revenue is summed server-side in one pass over completed payments
+        payments_pipeline = [{"$facet": {
+            "revenue": [
+                {"$match": {"status": "completed"}},
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": "$amount"},
+                    "monthly": {"$sum": {"$cond": [{"$gt": ["$completed_at", month_ago]}, "$amount", 0]}}
+                }}
+            ],
+            "pending": [{"$match": {"status": "pending"}}, {"$count": "n"}]
+        }}]
         
-        total_revenue = sum(p['amount'] for p in payments)
+        # Independent queries, run concurrently; unfiltered totals come from
+        # collection metadata and the tag status counts from the status index
+        total_businesses, active_subscriptions, gpt_usage, total_tags, available_tags, assigned_tags, payment_facets = await asyncio.gather(
+            self.db.businesses.estimated_document_count(),
+            self.db.subscriptions.count_documents({
+                "status": "active",
+                "expiry_date": {"$gt": now.isoformat()}
+            }),
+            self.db.reviews.estimated_document_count(),
+            self.db.tags.estimated_document_count(),
+            self.db.tags.count_documents({"status": TagStatus.INACTIVE}),
+            self.db.tags.count_documents({"status": {"$in": [TagStatus.PENDING, TagStatus.ACTIVE]}}),
+            self.db.payments.aggregate(payments_pipeline).to_list(1)
+        )
         
-        # Monthly revenue
-        month_ago = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-        monthly_payments = [p for p in payments if p.get('completed_at', '') > month_ago]
-        monthly_revenue = sum(p['amount'] for p in monthly_payments)
+        payment_facets = payment_facets[0]
+        revenue = payment_facets["revenue"][0] if payment_facets["revenue"] else {"total": 0, "monthly": 0}
+        total_revenue = revenue["total"]
+        monthly_revenue = revenue["monthly"]
+        pending_payments = _facet_value(payment_facets, "pending")
         
-        # Pending payments
-        pending_payments = await self.db.payments.count_documents({"status": "pending"})
+        # Estimate cost: ~$0.0002 per review
+        gpt_cost = gpt_usage * 0.0002
         
         return DashboardStats(
             total_businesses=total_businesses,
@@ -119,94 +280,95 @@ class AdminService:
             pending_payments=pending_payments
         )
     
-    async def get_notifications(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get system notifications"""
+    async def get_notifications(self, limit: int = 50, query: Optional[dict] = None) -> List[Dict[str, Any]]:
+        """Get system notifications, newest first"""
         notifications = await self.db.notifications.find(
-            {},
+            query or {},
             {"_id": 0}
-        ).sort("created_at", -1).limit(limit).to_list(limit)
+        ).sort([("created_at", -1), ("id", -1)]).limit(limit).batch_size(limit).to_list(limit)
         
         return notifications
     
     async def create_notification(self, notification: Notification):
         """Create system notification"""
-        notif_doc = notification.model_dump()
-        notif_doc['created_at'] = notif_doc['created_at'].isoformat()
-        await self.db.notifications.insert_one(notif_doc)
+        await self.db.notifications.insert_one(notification.to_dict())
     
     async def check_expiring_tags(self) -> List[Dict[str, Any]]:
         """Check for tags expiring in 7 days"""
         now = datetime.now(timezone.utc)
-        seven_days = (now + timedelta(days=7)).isoformat()
         
+        # Date range on the (status, expires_at) index
         expiring_tags = await self.db.tags.find({
             "status": TagStatus.ACTIVE,
             "expires_at": {
-                "$gte": now.isoformat(),
-                "$lte": seven_days
+                "$gte": now,
+                "$lte": now + timedelta(days=7)
             }
         }, {"_id": 0}).to_list(100)
         
         return expiring_tags
     
-    async def check_low_stock(self, threshold: int = 10) -> int:
-        """Check if tag inventory is low"""
-        available = await self.db.tags.count_documents({"status": TagStatus.INACTIVE})
-        return available
+    async def check_low_stock(self, threshold: int = 10) -> bool:
+        """Check if tag inventory is low (fewer than threshold unassigned tags)"""
+        # The count stops after threshold matches; only below-threshold matters
+        available = await self.db.tags.count_documents({"status": TagStatus.INACTIVE}, limit=threshold)
+        return available < threshold
     
     async def log_admin_action(self, admin: Admin, action: str, entity_type: str, entity_id: str, changes: dict, ip_address: Optional[str] = None):
         """Log admin action for audit trail"""
-        log = AuditLog(
-            admin_id=admin.id,
-            admin_email=admin.email,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            changes=changes,
-            ip_address=ip_address
-        )
-        
-        log_doc = log.model_dump()
-        log_doc['created_at'] = log_doc['created_at'].isoformat()
-        await self.db.audit_logs.insert_one(log_doc)
+        log_doc: AuditLogDoc = {
+            "id": new_id(),
+            "admin_id": admin.id,
+            "admin_email": admin.email,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "changes": changes,
+            "ip_address": ip_address,
+            "created_at": utcnow()
+        }
+        record_audit(log_doc)
         
         logger.info(f"Admin action logged: {admin.email} - {action} - {entity_type}:{entity_id}")
     
     async def get_business_analytics(self, business_id: str) -> Dict[str, Any]:
         """Get analytics for a specific business"""
-        # Reviews count
-        reviews_count = await self.db.reviews.count_documents({"business_id": business_id})
+        # Tag and payment totals are reduced server-side; only the subscription is a document
+        tags_pipeline = [
+            {"$match": {"business_id": business_id}},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "active": {"$sum": {"$cond": [{"$eq": ["$status", TagStatus.ACTIVE]}, 1, 0]}}
+            }}
+        ]
+        payments_pipeline = [
+            {"$match": {"business_id": business_id, "status": "completed"}},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "amount": {"$sum": "$amount"}}}
+        ]
         
-        # Tags assigned
-        tags = await self.db.tags.find(
-            {"business_id": business_id},
-            {"_id": 0}
-        ).to_list(100)
-        
-        active_tags = len([t for t in tags if t['status'] == TagStatus.ACTIVE])
-        
-        # Subscription info
-        subscription = await self.db.subscriptions.find_one(
-            {"business_id": business_id},
-            {"_id": 0},
-            sort=[("expiry_date", -1)]
+        # Independent queries, run concurrently
+        reviews_count, tag_totals, subscription, payment_totals = await asyncio.gather(
+            self.db.reviews.count_documents({"business_id": business_id}),
+            self.db.tags.aggregate(tags_pipeline).to_list(1),
+            self.db.subscriptions.find_one(
+                {"business_id": business_id},
+                {"_id": 0},
+                sort=[("expiry_date", -1)]
+            ),
+            self.db.payments.aggregate(payments_pipeline).to_list(1)
         )
         
-        # Payment history
-        payments = await self.db.payments.find(
-            {"business_id": business_id, "status": "completed"},
-            {"_id": 0}
-        ).to_list(50)
-        
-        total_paid = sum(p['amount'] for p in payments)
+        tag_totals = tag_totals[0] if tag_totals else {"total": 0, "active": 0}
+        payment_totals = payment_totals[0] if payment_totals else {"count": 0, "amount": 0}
         
         return {
             "reviews_count": reviews_count,
             "gpt_usage_count": reviews_count,
             "gpt_cost": round(reviews_count * 0.0002, 2),
-            "total_tags": len(tags),
-            "active_tags": active_tags,
+            "total_tags": tag_totals["total"],
+            "active_tags": tag_totals["active"],
             "subscription": subscription,
-            "payments_count": len(payments),
-            "total_paid": round(total_paid, 2)
+            "payments_count": payment_totals["count"],
+            "total_paid": round(payment_totals["amount"], 2)
         }
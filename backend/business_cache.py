@@ -0,0 +1,37 @@
+"""
+Read-through cache for business documents
+Most business endpoints start by loading the same document by id; a short TTL absorbs
+bursts (QR scans, dashboard refreshes) and every writer calls invalidate_business
+"""
+
+from cachetools import TTLCache
+from datetime import datetime
+from typing import Dict, Optional
+
+BUSINESS_CACHE_TTL = 30  # seconds
+
+_business_cache: TTLCache = TTLCache(maxsize=4096, ttl=BUSINESS_CACHE_TTL)
+
+# Business reads leave out the stored QR image; only the QR endpoint loads it
+BUSINESS_PROJECTION = {"_id": 0, "qr_png_b64": 0}
+
+# Rows not yet converted by migrate_dates.py still hold ISO strings; parse them once
+# when the document is cached
+_DATE_FIELDS = ("created_at", "trial_ends_at", "subscription_expires_at", "google_token_expires_at")
+
+async def get_business_doc(db, business_id: str) -> Optional[Dict]:
+    """Business document by id (without _id or the QR image), or None; each caller gets its own copy"""
+    doc = _business_cache.get(business_id)
+    if doc is None:
+        doc = await db.businesses.find_one({"id": business_id}, BUSINESS_PROJECTION)
+        if doc is None:
+            return None
+        for field in _DATE_FIELDS:
+            if isinstance(doc.get(field), str):
+                doc[field] = datetime.fromisoformat(doc[field]) if doc[field] else None
+        _business_cache[business_id] = doc
+    return dict(doc)
+
+def invalidate_business(business_id: str):
+    """Drop a cached business after writing to it"""
+    _business_cache.pop(business_id, None)
@@ -9,23 +9,23 @@ import asyncio
 import bcrypt
 import uuid
 from datetime import datetime, timezone
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from db import client, get_db
 
 # Load environment
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# bcrypt cost factor; 12 for production, lower (e.g. 4) only for local development
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+
 async def create_default_admin():
-    # Connect to MongoDB
-    mongo_url = os.environ['MONGO_URL']
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ['DB_NAME']]
+    db = get_db()
     
     # Check if admin already exists
-    existing = await db.admins.find_one({"email": "admin@test.com"})
+    existing = await db.admins.count_documents({"email": "admin@test.com"}, limit=1)
     
     if existing:
         print("✓ Admin user already exists: admin@test.com")
@@ -33,7 +33,8 @@ async def create_default_admin():
     
     # Create password hash
     password = "Test@1234"
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    password_hash = (await asyncio.to_thread(bcrypt.hashpw, password.encode('utf-8'), salt)).decode('utf-8')
     
     # Create admin
     admin = {
@@ -43,7 +44,7 @@ async def create_default_admin():
         "name": "Admin User",
         "role": "super_admin",
         "active": True,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "last_login": None
     }
     
@@ -53,8 +54,12 @@ async def create_default_admin():
     print("📧 Email: admin@test.com")
     print("🔑 Password: Test@1234")
     print("🔗 Login at: /admin/login")
-    
-    client.close()
+
+async def main():
+    try:
+        await create_default_admin()
+    finally:
+        client.close()
 
 if __name__ == "__main__":
-    asyncio.run(create_default_admin())
+    asyncio.run(main())
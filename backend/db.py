@@ -0,0 +1,27 @@
+"""
+Shared MongoDB client for the backend and its scripts
+Motor pools connections per client instance, so every module uses this one
+"""
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+import os
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+MONGO_URL = os.environ['MONGO_URL']
+DB_NAME = os.environ['DB_NAME']
+
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    tz_aware=True,
+    maxPoolSize=50,
+    minPoolSize=10,
+    serverSelectionTimeoutMS=30000  # fail requests after 30s without a reachable server
+)
+
+def get_db():
+    """Application database on the shared client"""
+    return client[DB_NAME]
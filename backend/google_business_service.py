@@ -2,11 +2,123 @@ from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from google_auth_httplib2 import AuthorizedHttp
+from collections import Counter
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime, timezone
+from typing import Optional
+import hashlib
+import httplib2
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Common positive and negative words used for keyword extraction
+POSITIVE_WORDS = frozenset([
+    'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'good', 'best',
+    'love', 'perfect', 'awesome', 'delicious', 'friendly', 'clean', 'fresh',
+    'helpful', 'nice', 'tasty', 'quick', 'fast', 'beautiful'
+])
+NEGATIVE_WORDS = frozenset([
+    'bad', 'terrible', 'awful', 'poor', 'worst', 'slow', 'dirty', 'rude',
+    'expensive', 'disappointing', 'cold', 'stale', 'unfriendly', 'unhelpful',
+    'late', 'wrong', 'horrible', 'disgusting', 'overpriced'
+])
+
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Google's star rating enum as numbers
+_RATING_MAP = {
+    'ONE': 1,
+    'TWO': 2,
+    'THREE': 3,
+    'FOUR': 4,
+    'FIVE': 5
+}
+
+def _build_review(review: dict) -> dict:
+    """Flatten one Google review into the fields the dashboard uses"""
+    reviewer = review.get('reviewer') or {}
+    reply = review.get('reviewReply') or {}
+    return {
+        'review_id': review.get('reviewId', ''),
+        'reviewer_name': reviewer.get('displayName', 'Anonymous'),
+        'reviewer_profile_photo': reviewer.get('profilePhotoUrl', ''),
+        'rating': _RATING_MAP.get(review.get('starRating'), 0),
+        'comment': review.get('comment', '')[:200],  # Limit to 200 chars
+        'create_time': review.get('createTime', ''),
+        'update_time': review.get('updateTime', ''),
+        'reply_comment': reply.get('comment'),
+        'reply_time': reply.get('updateTime'),
+        'has_reply': bool(reply)
+    }
+
+def _aware(expiry: Optional[datetime]) -> Optional[datetime]:
+    """google-auth reports expiry as naive UTC; tag it so it is stored as a UTC date"""
+    return expiry.replace(tzinfo=timezone.utc) if expiry else None
+
+# Accounts and locations change on human timescales; cache them per access token
+# (keyed by SHA-256 of the token) so page refreshes skip the Google round trip
+DIRECTORY_CACHE_TTL = 300  # seconds
+
+_directory_cache: TTLCache = TTLCache(maxsize=1024, ttl=DIRECTORY_CACHE_TTL)
+_directory_cache_stats = Counter()
+
+def _directory_key(kind: str, access_token: str, *parts) -> tuple:
+    """Cache key for an accounts/locations listing"""
+    return (kind, hashlib.sha256(access_token.encode('utf-8')).digest(), *parts)
+
+def _cached_directory(key: tuple):
+    """Cached listing for key, or None; counts hits and misses"""
+    value = _directory_cache.get(key)
+    outcome = "hit" if value is not None else "miss"
+    _directory_cache_stats[outcome] += 1
+    logger.debug(f"Google directory cache {outcome} ({key[0]}): {dict(_directory_cache_stats)}")
+    return value
+
+# Reviews change slowly; the reviews, filtered, keyword and metrics views of a location
+# share one cached fetch instead of each calling Google
+REVIEWS_CACHE_TTL = 300  # seconds
+
+_reviews_cache: TTLCache = TTLCache(maxsize=1024, ttl=REVIEWS_CACHE_TTL)
+
+def invalidate_location_reviews(location_name: str):
+    """Drop cached reviews for a location, e.g. after posting a reply"""
+    for key in [key for key in _reviews_cache if key[2] == location_name]:
+        _reviews_cache.pop(key, None)
+
+# Discovery-built API clients, built once per process; credentials are supplied per call
+GOOGLE_APIS = (
+    ('mybusinessaccountmanagement', 'v1'),
+    ('mybusinessbusinessinformation', 'v1'),
+    ('mybusiness', 'v4'),
+)
+
+_api_clients: dict = {}
+
+async def api_client(api_name: str, version: str):
+    """API client for api_name/version; discovery is blocking HTTP, so it is built on a worker thread"""
+    client = _api_clients.get((api_name, version))
+    if client is None:
+        client = await run_in_threadpool(build, api_name, version, http=httplib2.Http(), cache_discovery=False)
+        _api_clients[(api_name, version)] = client
+    return client
+
+async def warm_api_clients():
+    """Build every client ahead of the first request; a failed build is retried on demand"""
+    for api_name, version in GOOGLE_APIS:
+        try:
+            await api_client(api_name, version)
+        except Exception as e:
+            logger.warning(f"Could not build Google {api_name} {version} client: {str(e)}")
+
+def authorized_http(credentials: Credentials) -> AuthorizedHttp:
+    """Fresh HTTP transport carrying the caller's credentials"""
+    return AuthorizedHttp(credentials, http=httplib2.Http())
+
 class GoogleBusinessService:
     """Service for interacting with Google My Business API"""
     
@@ -16,22 +128,29 @@ class GoogleBusinessService:
         self.client_id = os.environ.get('GOOGLE_CLIENT_ID')
         self.client_secret = os.environ.get('GOOGLE_CLIENT_SECRET')
         self.redirect_uri = os.environ.get('GOOGLE_REDIRECT_URI')
+        
+        # OAuth client config never changes, so build it once
+        self._client_config = {
+            "web": {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "redirect_uris": [self.redirect_uri]
+            }
+        }
     
-    def get_authorization_url(self, state: str):
-        """Generate OAuth authorization URL"""
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": [self.redirect_uri]
-                }
-            },
+    def _new_flow(self) -> Flow:
+        """Fresh OAuth flow; Flow holds per-exchange state so it is not shared"""
+        return Flow.from_client_config(
+            self._client_config,
             scopes=self.SCOPES,
             redirect_uri=self.redirect_uri
         )
+    
+    def get_authorization_url(self, state: str):
+        """Generate OAuth authorization URL"""
+        flow = self._new_flow()
         
         authorization_url, state = flow.authorization_url(
             access_type='offline',
@@ -41,45 +160,40 @@ class GoogleBusinessService:
         
         return authorization_url, state
     
-    def exchange_code_for_tokens(self, code: str):
+    async def exchange_code_for_tokens(self, code: str):
         """Exchange authorization code for access and refresh tokens"""
         try:
-            flow = Flow.from_client_config(
-                {
-                    "web": {
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret,
-                        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                        "token_uri": "https://oauth2.googleapis.com/token",
-                        "redirect_uris": [self.redirect_uri]
-                    }
-                },
-                scopes=self.SCOPES,
-                redirect_uri=self.redirect_uri
-            )
+            flow = self._new_flow()
             
-            flow.fetch_token(code=code)
+            await run_in_threadpool(flow.fetch_token, code=code)
             credentials = flow.credentials
             
             return {
                 "access_token": credentials.token,
                 "refresh_token": credentials.refresh_token,
-                "expires_at": credentials.expiry.isoformat() if credentials.expiry else None
+                "expires_at": _aware(credentials.expiry)
             }
         except Exception as e:
             logger.error(f"Error exchanging code for tokens: {str(e)}")
             raise
     
-    def get_business_accounts(self, access_token: str):
-        """Fetch all business accounts for the authenticated user"""
+    async def get_business_accounts(self, access_token: str, force_refresh: bool = False):
+        """Fetch all business accounts for the authenticated user (cached for DIRECTORY_CACHE_TTL)"""
+        key = _directory_key('accounts', access_token)
+        if not force_refresh:
+            cached = _cached_directory(key)
+            if cached is not None:
+                return cached
+        
         try:
-            credentials = Credentials(token=access_token)
-            service = build('mybusinessaccountmanagement', 'v1', credentials=credentials)
+            service = await api_client('mybusinessaccountmanagement', 'v1')
             
             # List accounts
-            accounts_response = service.accounts().list().execute()
+            request = service.accounts().list()
+            accounts_response = await run_in_threadpool(request.execute, http=authorized_http(Credentials(token=access_token)))
             accounts = accounts_response.get('accounts', [])
             
+            _directory_cache[key] = accounts
             return accounts
         except HttpError as e:
             logger.error(f"HTTP Error fetching accounts: {str(e)}")
@@ -88,17 +202,24 @@ class GoogleBusinessService:
             logger.error(f"Error fetching accounts: {str(e)}")
             raise
     
-    def get_business_locations(self, access_token: str, account_name: str):
-        """Fetch all locations for a specific business account"""
+    async def get_business_locations(self, access_token: str, account_name: str, force_refresh: bool = False):
+        """Fetch all locations for a specific business account (cached for DIRECTORY_CACHE_TTL)"""
+        key = _directory_key('locations', access_token, account_name)
+        if not force_refresh:
+            cached = _cached_directory(key)
+            if cached is not None:
+                return cached
+        
         try:
-            credentials = Credentials(token=access_token)
-            service = build('mybusinessbusinessinformation', 'v1', credentials=credentials)
+            service = await api_client('mybusinessbusinessinformation', 'v1')
             
             # List locations
             parent = account_name
-            locations_response = service.accounts().locations().list(parent=parent, readMask='name,title,storefrontAddress,phoneNumbers').execute()
+            request = service.accounts().locations().list(parent=parent, readMask='name,title,storefrontAddress,phoneNumbers')
+            locations_response = await run_in_threadpool(request.execute, http=authorized_http(Credentials(token=access_token)))
             locations = locations_response.get('locations', [])
             
+            _directory_cache[key] = locations
             return locations
         except HttpError as e:
             logger.error(f"HTTP Error fetching locations: {str(e)}")
@@ -107,44 +228,27 @@ class GoogleBusinessService:
             logger.error(f"Error fetching locations: {str(e)}")
             raise
     
-    def get_location_reviews(self, access_token: str, location_name: str, page_size: int = 50):
-        """Fetch reviews for a specific location"""
+    async def get_location_reviews(self, access_token: str, location_name: str, page_size: int = 50, force_refresh: bool = False):
+        """Fetch reviews for a specific location (cached for REVIEWS_CACHE_TTL)"""
+        key = _directory_key('reviews', access_token, location_name, page_size)
+        if not force_refresh:
+            cached = _reviews_cache.get(key)
+            if cached is not None:
+                return cached
+        
         try:
-            credentials = Credentials(token=access_token)
-            service = build('mybusiness', 'v4', credentials=credentials)
+            service = await api_client('mybusiness', 'v4')
             
             # Fetch reviews
-            reviews_response = service.accounts().locations().reviews().list(
+            request = service.accounts().locations().reviews().list(
                 parent=location_name,
                 pageSize=page_size
-            ).execute()
-            
-            reviews = reviews_response.get('reviews', [])
-            average_rating = reviews_response.get('averageRating', 0)
-            total_review_count = reviews_response.get('totalReviewCount', 0)
-            
-            # Process reviews to extract actionable data
-            processed_reviews = []
-            for review in reviews:
-                star_rating = self._parse_star_rating(review.get('starRating'))
-                processed_reviews.append({
-                    'review_id': review.get('reviewId', ''),
-                    'reviewer_name': review.get('reviewer', {}).get('displayName', 'Anonymous'),
-                    'reviewer_profile_photo': review.get('reviewer', {}).get('profilePhotoUrl', ''),
-                    'rating': star_rating,
-                    'comment': review.get('comment', '')[:200],  # Limit to 200 chars
-                    'create_time': review.get('createTime', ''),
-                    'update_time': review.get('updateTime', ''),
-                    'reply_comment': review.get('reviewReply', {}).get('comment', None),
-                    'reply_time': review.get('reviewReply', {}).get('updateTime', None),
-                    'has_reply': bool(review.get('reviewReply'))
-                })
+            )
+            reviews_response = await run_in_threadpool(request.execute, http=authorized_http(Credentials(token=access_token)))
             
-            return {
-                'reviews': processed_reviews,
-                'average_rating': average_rating,
-                'total_review_count': total_review_count
-            }
+            reviews_data = self._process_reviews(reviews_response)
+            _reviews_cache[key] = reviews_data
+            return reviews_data
         except HttpError as e:
             if e.resp.status == 403:
                 logger.error("Access denied. Make sure the Google My Business API is enabled and you have proper permissions.")
@@ -154,57 +258,46 @@ class GoogleBusinessService:
             logger.error(f"Error fetching reviews: {str(e)}")
             raise
     
+    def _process_reviews(self, reviews_response):
+        """Shape a reviews.list response into the fields the dashboard uses"""
+        reviews = reviews_response.get('reviews', [])
+        average_rating = reviews_response.get('averageRating', 0)
+        total_review_count = reviews_response.get('totalReviewCount', 0)
+        
+        # Process reviews to extract actionable data
+        processed_reviews = [_build_review(review) for review in reviews]
+        
+        return {
+            'reviews': processed_reviews,
+            'average_rating': average_rating,
+            'total_review_count': total_review_count
+        }
+    
     def _parse_star_rating(self, star_rating_str):
         """Convert Google's star rating enum to number"""
-        rating_map = {
-            'ONE': 1,
-            'TWO': 2,
-            'THREE': 3,
-            'FOUR': 4,
-            'FIVE': 5
-        }
-        return rating_map.get(star_rating_str, 0)
+        return _RATING_MAP.get(star_rating_str, 0)
     
     def extract_keywords(self, reviews_data):
         """Extract top positive and negative keywords from reviews"""
-        import re
-        from collections import Counter
-        
-        positive_keywords = []
-        negative_keywords = []
-        
-        # Common positive and negative words
-        positive_words = ['great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'good', 'best', 
-                         'love', 'perfect', 'awesome', 'delicious', 'friendly', 'clean', 'fresh',
-                         'helpful', 'nice', 'tasty', 'quick', 'fast', 'beautiful']
-        negative_words = ['bad', 'terrible', 'awful', 'poor', 'worst', 'slow', 'dirty', 'rude',
-                         'expensive', 'disappointing', 'cold', 'stale', 'unfriendly', 'unhelpful',
-                         'late', 'wrong', 'horrible', 'disgusting', 'overpriced']
+        positive_counter = Counter()
+        negative_counter = Counter()
         
         for review in reviews_data:
             if not review.get('comment'):
                 continue
-                
-            comment = review['comment'].lower()
-            words = re.findall(r'\b\w+\b', comment)
-            rating = review.get('rating', 0)
             
-            for word in words:
-                if word in positive_words and rating >= 4:
-                    positive_keywords.append(word)
-                elif word in negative_words and rating <= 2:
-                    negative_keywords.append(word)
-        
-        # Count and get top keywords
-        positive_counter = Counter(positive_keywords)
-        negative_counter = Counter(negative_keywords)
+            rating = review.get('rating', 0)
+            if rating >= 4:
+                positive_counter.update(w for w in _WORD_RE.findall(review['comment'].lower()) if w in POSITIVE_WORDS)
+            elif rating <= 2:
+                negative_counter.update(w for w in _WORD_RE.findall(review['comment'].lower()) if w in NEGATIVE_WORDS)
         
         return {
             'positive': [{'word': word, 'count': count} for word, count in positive_counter.most_common(10)],
             'negative': [{'word': word, 'count': count} for word, count in negative_counter.most_common(10)]
         }
     
-    def refresh_access_token(self, refresh_token: str):
+    async def refresh_access_token(self, refresh_token: str):
         """Refresh an expired access token using refresh token"""
         try:
             credentials = Credentials(
@@ -217,11 +310,11 @@ class GoogleBusinessService:
             
             # Trigger refresh
             from google.auth.transport.requests import Request
-            credentials.refresh(Request())
+            await run_in_threadpool(credentials.refresh, Request())
             
             return {
                 "access_token": credentials.token,
-                "expires_at": credentials.expiry.isoformat() if credentials.expiry else None
+                "expires_at": _aware(credentials.expiry)
             }
         except Exception as e:
             logger.error(f"Error refreshing token: {str(e)}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Convert ISO-string timestamps to native BSON dates
+Businesses, users, sessions and the admin collections are now written with native
+dates and queried or paginated by date; run this once, before deploying that change,
+so rows written earlier match those queries. Admin session lookups and the session
+TTL indexes only see date-typed expires_at values
+"""
+
+import asyncio
+from datetime import datetime
+from pymongo import UpdateOne
+from db import client, get_db
+
+# Collection -> timestamp fields that used to be stored as ISO strings
+DATE_FIELDS = {
+    "businesses": ["created_at", "trial_ends_at", "subscription_expires_at", "google_token_expires_at"],
+    "users": ["created_at"],
+    "user_sessions": ["created_at", "expires_at"],
+    "admins": ["created_at", "last_login"],
+    "admin_sessions": ["created_at", "expires_at"],
+    "audit_logs": ["created_at"],
+    "tags": ["created_at", "assigned_at", "activated_at", "expires_at", "scrapped_at"],
+    "tag_history": ["created_at"],
+    "notifications": ["created_at"],
+    "admin_notifications": ["created_at"],
+    "payments": ["created_at", "completed_at"],
+    "coupons": ["valid_from", "valid_until", "created_at"],
+    "support_tickets": ["created_at", "updated_at", "resolved_at"],
+}
+
+BATCH_SIZE = 500
+
+async def migrate_collection(db, name: str, fields: list) -> int:
+    """Rewrite string timestamps in one collection; returns documents updated"""
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    
+    updated = 0
+    ops = []
+    async for doc in db[name].find(query, projection, batch_size=BATCH_SIZE):
+        # Empty strings meant "not set"
+        changes = {
+            field: datetime.fromisoformat(doc[field]) if doc[field] else None
+            for field in fields
+            if isinstance(doc.get(field), str)
+        }
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if len(ops) == BATCH_SIZE:
+            updated += (await db[name].bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated += (await db[name].bulk_write(ops, ordered=False)).modified_count
+    
+    return updated
+
+async def main():
+    db = get_db()
+    try:
+        for name, fields in DATE_FIELDS.items():
+            updated = await migrate_collection(db, name, fields)
+            print(f"✓ {name}: {updated} documents converted")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
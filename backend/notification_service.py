@@ -1,9 +1,74 @@
 # Notification Service - Automated alerts and color-coded notifications
 
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+import asyncio
+from cachetools import TTLCache
+from typing import List, Dict, Optional, Tuple
 import uuid
 
+# Badge counts are polled by the admin UI; recompute them at most once per TTL window
+NOTIFICATION_BADGES_TTL = 10  # seconds
+
+_badges_cache: TTLCache = TTLCache(maxsize=1, ttl=NOTIFICATION_BADGES_TTL)
+
+def invalidate_notification_badges() -> None:
+    """Drop the cached badge counts so the next request recomputes them"""
+    _badges_cache.clear()
+
+# Rows per getMore when streaming business alerts
+ALERT_BATCH_SIZE = 200
+
+# Business alert labels by alert_type ("expiring" messages carry the days left)
+ALERT_COLORS = {"new": "blue", "expired": "red", "expiring": "yellow", "active": "green"}
+ALERT_MESSAGES = {
+    "new": "New business registered",
+    "expired": "Subscription expired",
+    "active": "Active subscription"
+}
+
+def indexed_pipeline(stages: List[Dict]) -> List[Dict]:
+    """Check that an aggregation opens with $match on stored fields, so the planner can
+    use an index; a $project/$set placed first would force a collection scan"""
+    if not stages or "$match" not in stages[0]:
+        raise ValueError("aggregation pipelines must start with $match")
+    return stages
+
+def _since(field: str, bound: datetime) -> Dict:
+    """Filter for field >= bound, also matching rows that still hold an ISO-string
+    timestamp (migrate_dates.py converts those; strings never compare to dates)"""
+    return {"$or": [{field: {"$gte": bound}}, {field: {"$gte": bound.isoformat()}}]}
+
+def _as_date(field: str) -> Dict:
+    """Expression reading field as a date, parsing legacy ISO strings ("" becomes null)"""
+    return {"$cond": [
+        {"$eq": [{"$type": f"${field}"}, "string"]},
+        {"$convert": {"input": f"${field}", "to": "date", "onError": None, "onNull": None}},
+        f"${field}"
+    ]}
+
+def _notification_lookup(type: str, field: str, key: str, since: datetime = None) -> Dict:
+    """$lookup stage collecting any `type` notification whose `field` equals `key` as existing"""
+    conditions = [{"$eq": ["$type", type]}, {"$eq": [f"${field}", "$$key"]}]
+    if since:
+        conditions.append({"$gte": ["$created_at", since]})
+    return {"$lookup": {
+        "from": "admin_notifications",
+        "let": {"key": key},
+        "pipeline": [
+            {"$match": {"$expr": {"$and": conditions}}},
+            {"$limit": 1},
+            {"$project": {"_id": 1}}
+        ],
+        "as": "existing"
+    }}
+
+def _without_notification(type: str, field: str, key: str, since: datetime = None) -> List[Dict]:
+    """Stages dropping rows that already have a matching notification"""
+    return [
+        _notification_lookup(type, field, key, since),
+        {"$match": {"existing": {"$size": 0}}}
+    ]
+
 class NotificationService:
     def __init__(self, db):
         self.db = db
@@ -12,7 +77,22 @@ class NotificationService:
                                    priority: str = "medium", related_id: str = None,
                                    business_id: str = None, metadata: dict = None):
         """Create a new notification"""
-        notification = {
+        notification = self.notification_doc(type, title, message, priority, related_id, business_id, metadata)
+        
+        await self.db.admin_notifications.insert_one(notification)
+        return notification
+    
+    async def create_notifications_bulk(self, notifications: List[Dict]):
+        """Insert notification documents (from notification_doc) in one round-trip"""
+        if notifications:
+            await self.db.admin_notifications.insert_many(notifications, ordered=False)
+    
+    @staticmethod
+    def notification_doc(type: str, title: str, message: str, 
+                         priority: str = "medium", related_id: str = None,
+                         business_id: str = None, metadata: dict = None) -> Dict:
+        """Build a notification document"""
+        return {
             "id": str(uuid.uuid4()),
             "type": type,  # NEW_BUSINESS, SUBSCRIPTION_EXPIRING, SUBSCRIPTION_EXPIRED, TAG_PENDING, SUPPORT_TICKET
             "title": title,
@@ -22,11 +102,8 @@ class NotificationService:
             "business_id": business_id,
             "metadata": metadata or {},
             "is_read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
-        
-        await self.db.admin_notifications.insert_one(notification)
-        return notification
     
     async def get_unread_count(self) -> int:
         """Get count of unread notifications"""
@@ -40,10 +117,19 @@ class NotificationService:
         notifications = await self.db.admin_notifications.find(
             query,
             {"_id": 0}
-        ).sort("created_at", -1).limit(limit).to_list(limit)
+        ).sort("created_at", -1).limit(limit).batch_size(limit).to_list(limit)
         
         return notifications
     
+    async def get_recent_with_count(self, limit: int = 10) -> Tuple[List[Dict], int]:
+        """Get the latest notifications and the unread count concurrently"""
+        # Two index-backed queries; a $facet over the collection would sort it in memory
+        recent, unread_count = await asyncio.gather(
+            self.get_notifications(limit),
+            self.get_unread_count()
+        )
+        return recent, unread_count
+    
     async def mark_as_read(self, notification_ids: List[str]):
         """Mark notifications as read"""
         await self.db.admin_notifications.update_many(
@@ -59,35 +145,56 @@ class NotificationService:
         )
     
     async def get_notification_badges(self) -> Dict:
+        """Notification badges for admin tabs, served from the short-lived cache when fresh"""
+        badges = _badges_cache.get("badges")
+        if badges is None:
+            badges = await self._compute_notification_badges()
+            _badges_cache["badges"] = badges
+        return badges
+    
+    async def _compute_notification_badges(self) -> Dict:
         """Get notification badges for admin tabs"""
+        # Subscription expiry dates are ISO strings; format those bounds once
         now = datetime.now(timezone.utc)
-        seven_days_later = now + timedelta(days=7)
-        
-        # New businesses (last 24 hours)
+        now_iso = now.isoformat()
         yesterday = now - timedelta(days=1)
-        new_businesses_count = await self.db.businesses.count_documents({
-            "created_at": {"$gte": yesterday.isoformat()}
-        })
+        seven_days_later_iso = (now + timedelta(days=7)).isoformat()
         
-        # Expiring subscriptions (within 7 days)
-        expiring_count = await self.db.subscriptions.count_documents({
-            "status": "active",
-            "expiry_date": {
-                "$gte": now.isoformat(),
-                "$lte": seven_days_later.isoformat()
-            }
-        })
+        # Both subscription badges come from one $facet; the leading $match narrows
+        # it on the (status, expiry_date) index to rows either branch can count
+        subscriptions_pipeline = indexed_pipeline([
+            {"$match": {
+                "status": {"$in": ["active", "expired"]},
+                "expiry_date": {"$lte": seven_days_later_iso}
+            }},
+            {"$facet": {
+                # Expiring subscriptions (within 7 days)
+                "expiring": [
+                    {"$match": {"status": "active", "expiry_date": {"$gte": now_iso}}},
+                    {"$count": "n"}
+                ],
+                # Expired subscriptions
+                "expired": [
+                    {"$match": {"status": "expired", "expiry_date": {"$lt": now_iso}}},
+                    {"$count": "n"}
+                ]
+            }}
+        ])
         
-        # Expired subscriptions
-        expired_count = await self.db.subscriptions.count_documents({
-            "status": "expired",
-            "expiry_date": {"$lt": now.isoformat()}
-        })
+        # Independent queries, run concurrently
+        new_businesses_count, subscription_facets, pending_tags_count = await asyncio.gather(
+            # New businesses (last 24 hours)
+            self.db.businesses.count_documents(_since("created_at", yesterday)),
+            self.db.subscriptions.aggregate(subscriptions_pipeline).to_list(1),
+            # Pending tag allocations
+            self.db.business_tags.count_documents({
+                "status": "pending"
+            })
+        )
         
-        # Pending tag allocations
-        pending_tags_count = await self.db.business_tags.count_documents({
-            "status": "pending"
-        })
+        subscription_facets = subscription_facets[0]
+        expiring_count = subscription_facets["expiring"][0]["n"] if subscription_facets["expiring"] else 0
+        expired_count = subscription_facets["expired"][0]["n"] if subscription_facets["expired"] else 0
         
         return {
             "new_businesses": new_businesses_count,
@@ -100,195 +207,190 @@ class NotificationService:
     async def get_business_alerts(self) -> List[Dict]:
         """Get all business alerts with status"""
         now = datetime.now(timezone.utc)
-        seven_days_later = now + timedelta(days=7)
         yesterday = now - timedelta(days=1)
+        seven_days_later = now + timedelta(days=7)
         
-        # Get all businesses
-        businesses = await self.db.businesses.find({}, {"_id": 0}).to_list(1000)
+        # Businesses are classified server-side against native date bounds; rows not yet
+        # converted by migrate_dates.py have their ISO strings parsed before comparing
+        no_expiry = {"$eq": [{"$ifNull": ["$subscription_expires_at", None]}, None]}
+        cursor = self.db.businesses.aggregate(indexed_pipeline([
+            {"$match": {"$or": [
+                *_since("created_at", yesterday)["$or"],
+                {"subscription_expires_at": {"$nin": [None, ""]}}
+            ]}},
+            {"$set": {
+                "created_at": _as_date("created_at"),
+                "subscription_expires_at": _as_date("subscription_expires_at")
+            }},
+            {"$set": {"alert_type": {"$switch": {
+                "branches": [
+                    {"case": {"$gte": ["$created_at", yesterday]}, "then": "new"},
+                    {"case": no_expiry, "then": None},
+                    {"case": {"$or": [
+                        {"$eq": ["$subscription_status", "expired"]},
+                        {"$lt": ["$subscription_expires_at", now]}
+                    ]}, "then": "expired"},
+                    {"case": {"$lte": ["$subscription_expires_at", seven_days_later]}, "then": "expiring"},
+                    {"case": {"$eq": ["$subscription_status", "active"]}, "then": "active"}
+                ],
+                "default": None
+            }}}},
+            {"$match": {"alert_type": {"$ne": None}}},
+            {"$project": {
+                "_id": 0,
+                "business_id": "$id",
+                "business_name": "$name",
+                "alert_type": 1,
+                "created_at": 1,
+                "subscription_expires_at": 1
+            }},
+            {"$limit": 1000}
+        ]), batchSize=ALERT_BATCH_SIZE)
         
+        # Rows are labelled as batches arrive rather than buffered first
         alerts = []
-        for business in businesses:
-            alert = {
-                "business_id": business.get("id"),
-                "business_name": business.get("name"),
-                "alert_type": None,
-                "alert_color": None,
-                "alert_message": None,
-                "created_at": business.get("created_at")
-            }
+        async for row in cursor:
+            alert_type = row["alert_type"]
+            if alert_type == "expiring":
+                days_left = (row["subscription_expires_at"] - now).days
+                alert_message = f"Expiring in {days_left} days"
+            else:
+                alert_message = ALERT_MESSAGES[alert_type]
             
-            # Check if business is new (created in last 24 hours)
-            created_at_str = business.get("created_at")
-            if created_at_str:
-                try:
-                    created_at = datetime.fromisoformat(created_at_str) if isinstance(created_at_str, str) else created_at_str
-                    if created_at >= yesterday:
-                        alert["alert_type"] = "new"
-                        alert["alert_color"] = "blue"
-                        alert["alert_message"] = "New business registered"
-                        alerts.append(alert)
-                        continue
-                except:
-                    pass
-            
-            # Check subscription status from business record itself
-            subscription_status = business.get("subscription_status")
-            subscription_expires_at_str = business.get("subscription_expires_at")
-            
-            if subscription_expires_at_str:
-                try:
-                    expiry_date = datetime.fromisoformat(subscription_expires_at_str) if isinstance(subscription_expires_at_str, str) else subscription_expires_at_str
-                    
-                    if subscription_status == "expired" or expiry_date < now:
-                        alert["alert_type"] = "expired"
-                        alert["alert_color"] = "red"
-                        alert["alert_message"] = "Subscription expired"
-                        alerts.append(alert)
-                    elif expiry_date <= seven_days_later:
-                        alert["alert_type"] = "expiring"
-                        alert["alert_color"] = "yellow"
-                        days_left = (expiry_date - now).days
-                        alert["alert_message"] = f"Expiring in {days_left} days"
-                        alerts.append(alert)
-                    elif subscription_status == "active":
-                        alert["alert_type"] = "active"
-                        alert["alert_color"] = "green"
-                        alert["alert_message"] = "Active subscription"
-                        alerts.append(alert)
-                except:
-                    pass
+            alerts.append({
+                "business_id": row.get("business_id"),
+                "business_name": row.get("business_name"),
+                "alert_type": alert_type,
+                "alert_color": ALERT_COLORS[alert_type],
+                "alert_message": alert_message,
+                "created_at": row.get("created_at")
+            })
         
         return alerts
     
+    async def _business_names(self, business_ids) -> Dict[str, str]:
+        """Map business id to name for the given ids; missing businesses are absent"""
+        if not business_ids:
+            return {}
+        return {
+            business["id"]: business.get("name")
+            async for business in self.db.businesses.find(
+                {"id": {"$in": list(business_ids)}},
+                {"_id": 0, "id": 1, "name": 1}
+            )
+        }
+    
     async def check_and_create_alerts(self):
         """Check for conditions and create notifications (run periodically)"""
         now = datetime.now(timezone.utc)
-        seven_days_later = now + timedelta(days=7)
-        
-        # Check for new businesses (last 24 hours)
+        now_iso = now.isoformat()
         yesterday = now - timedelta(days=1)
-        new_businesses = await self.db.businesses.find(
-            {"created_at": {"$gte": yesterday.isoformat()}},
-            {"_id": 0}
-        ).to_list(100)
+        seven_days_later_iso = (now + timedelta(days=7)).isoformat()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        for business in new_businesses:
-            # Check if notification already exists
-            existing = await self.db.admin_notifications.find_one({
-                "type": "NEW_BUSINESS",
-                "business_id": business.get("id")
-            })
-            
-            if not existing:
-                await self.create_notification(
-                    type="NEW_BUSINESS",
-                    title="New Business Registration",
-                    message=f"{business.get('name')} has registered",
-                    priority="medium",
-                    business_id=business.get("id")
-                )
+        # Expire overdue subscriptions server-side in one write; expired_at marks
+        # this sweep's batch so it can be read back for notifications (truncated to
+        # milliseconds, as BSON stores it, so the read-back matches exactly)
+        expired_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        expired = await self.db.subscriptions.update_many(
+            {"status": "active", "expiry_date": {"$lt": now_iso}},
+            {"$set": {"status": "expired", "expired_at": expired_at}}
+        )
+        if expired.modified_count:
+            invalidate_notification_badges()
         
-        # Check for expiring subscriptions
-        expiring_subs = await self.db.subscriptions.find(
-            {
-                "status": "active",
-                "expiry_date": {
-                    "$gte": now.isoformat(),
-                    "$lte": seven_days_later.isoformat()
-                }
-            },
-            {"_id": 0}
-        ).to_list(100)
+        # Each check is one aggregation: candidates are joined to any existing
+        # notification, and only the un-notified survivors come back.
+        # The checks are independent, so they run concurrently.
+        new_businesses, expiring_subs, expired_subs, pending_tags = await asyncio.gather(
+            # New businesses (last 24 hours)
+            self.db.businesses.aggregate(indexed_pipeline([
+                {"$match": _since("created_at", yesterday)},
+                {"$limit": 100},
+                *_without_notification("NEW_BUSINESS", "business_id", "$id"),
+                {"$project": {"_id": 0, "id": 1, "name": 1}}
+            ])).to_list(100),
+            # Expiring subscriptions (one notification per business per day)
+            self.db.subscriptions.aggregate(indexed_pipeline([
+                {"$match": {
+                    "status": "active",
+                    "expiry_date": {
+                        "$gte": now_iso,
+                        "$lte": seven_days_later_iso
+                    }
+                }},
+                {"$limit": 100},
+                *_without_notification("SUBSCRIPTION_EXPIRING", "business_id", "$business_id", since=today_start),
+                {"$project": {"_id": 0, "business_id": 1, "expiry_date": 1}}
+            ])).to_list(100),
+            # Subscriptions expired by this sweep
+            self.db.subscriptions.aggregate(indexed_pipeline([
+                {"$match": {"expired_at": expired_at}},
+                {"$limit": 100},
+                *_without_notification("SUBSCRIPTION_EXPIRED", "business_id", "$business_id"),
+                {"$project": {"_id": 0, "business_id": 1}}
+            ])).to_list(100),
+            # Pending tag allocations
+            self.db.business_tags.aggregate(indexed_pipeline([
+                {"$match": {"status": "pending"}},
+                {"$limit": 100},
+                *_without_notification("TAG_PENDING", "related_id", "$id"),
+                {"$project": {"_id": 0, "id": 1, "business_id": 1}}
+            ])).to_list(100)
+        )
         
-        for sub in expiring_subs:
-            # Check if notification already exists for today
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            existing = await self.db.admin_notifications.find_one({
-                "type": "SUBSCRIPTION_EXPIRING",
-                "business_id": sub.get("business_id"),
-                "created_at": {"$gte": today_start.isoformat()}
-            })
-            
-            if not existing:
-                business = await self.db.businesses.find_one(
-                    {"id": sub.get("business_id")},
-                    {"_id": 0}
-                )
-                
-                if business:
-                    expiry_date = datetime.fromisoformat(sub.get("expiry_date"))
-                    days_left = (expiry_date - now).days
-                    
-                    await self.create_notification(
-                        type="SUBSCRIPTION_EXPIRING",
-                        title="Subscription Expiring Soon",
-                        message=f"{business.get('name')}'s subscription expires in {days_left} days",
-                        priority="high",
-                        business_id=sub.get("business_id"),
-                        metadata={"days_left": days_left}
-                    )
+        # Business names for every check in one $in query
+        names = await self._business_names(
+            {row["business_id"] for row in (*expiring_subs, *expired_subs, *pending_tags)}
+        )
         
-        # Check for expired subscriptions
-        expired_subs = await self.db.subscriptions.find(
-            {
-                "status": "active",
-                "expiry_date": {"$lt": now.isoformat()}
-            },
-            {"_id": 0}
-        ).to_list(100)
+        # New notifications are collected and inserted together at the end
+        notifications = []
         
-        for sub in expired_subs:
-            # Update subscription status
-            await self.db.subscriptions.update_one(
-                {"id": sub.get("id")},
-                {"$set": {"status": "expired"}}
-            )
-            
-            # Check if notification already exists
-            existing = await self.db.admin_notifications.find_one({
-                "type": "SUBSCRIPTION_EXPIRED",
-                "business_id": sub.get("business_id")
-            })
+        for business in new_businesses:
+            notifications.append(self.notification_doc(
+                type="NEW_BUSINESS",
+                title="New Business Registration",
+                message=f"{business.get('name')} has registered",
+                priority="medium",
+                business_id=business.get("id")
+            ))
+        
+        for sub in expiring_subs:
+            if sub["business_id"] not in names:
+                continue
+            expiry_date = datetime.fromisoformat(sub.get("expiry_date"))
+            days_left = (expiry_date - now).days
             
-            if not existing:
-                business = await self.db.businesses.find_one(
-                    {"id": sub.get("business_id")},
-                    {"_id": 0}
-                )
-                
-                if business:
-                    await self.create_notification(
-                        type="SUBSCRIPTION_EXPIRED",
-                        title="Subscription Expired",
-                        message=f"{business.get('name')}'s subscription has expired",
-                        priority="critical",
-                        business_id=sub.get("business_id")
-                    )
+            notifications.append(self.notification_doc(
+                type="SUBSCRIPTION_EXPIRING",
+                title="Subscription Expiring Soon",
+                message=f"{names[sub['business_id']]}'s subscription expires in {days_left} days",
+                priority="high",
+                business_id=sub.get("business_id"),
+                metadata={"days_left": days_left}
+            ))
         
-        # Check for pending tag allocations
-        pending_tags = await self.db.business_tags.find(
-            {"status": "pending"},
-            {"_id": 0}
-        ).to_list(100)
+        for sub in expired_subs:
+            if sub["business_id"] in names:
+                notifications.append(self.notification_doc(
+                    type="SUBSCRIPTION_EXPIRED",
+                    title="Subscription Expired",
+                    message=f"{names[sub['business_id']]}'s subscription has expired",
+                    priority="critical",
+                    business_id=sub.get("business_id")
+                ))
         
         for tag in pending_tags:
-            existing = await self.db.admin_notifications.find_one({
-                "type": "TAG_PENDING",
-                "related_id": tag.get("id")
-            })
-            
-            if not existing:
-                business = await self.db.businesses.find_one(
-                    {"id": tag.get("business_id")},
-                    {"_id": 0}
-                )
-                
-                if business:
-                    await self.create_notification(
-                        type="TAG_PENDING",
-                        title="Tag Allocation Pending",
-                        message=f"{business.get('name')} has pending tag allocation",
-                        priority="medium",
-                        related_id=tag.get("id"),
-                        business_id=tag.get("business_id")
-                    )
+            if tag["business_id"] not in names:
+                continue
+            notifications.append(self.notification_doc(
+                type="TAG_PENDING",
+                title="Tag Allocation Pending",
+                message=f"{names[tag['business_id']]} has pending tag allocation",
+                priority="medium",
+                related_id=tag.get("id"),
+                business_id=tag.get("business_id")
+            ))
+        
+        await self.create_notifications_bulk(notifications)
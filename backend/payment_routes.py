@@ -1,15 +1,18 @@
 # Payment and Subscription Endpoints
 # Integrated with Razorpay for secure payment processing
 
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from subscription_models import (
     BusinessRegisterRequest, SubscriptionPlanRequest, PaymentVerifyRequest,
     CouponApplyRequest, PlanType, Currency, PRICING, Payment, PaymentStatus
 )
 from subscription_service import SubscriptionService
+from admin_routes import json_response
+from admin_models import new_id
 import razorpay
 import hmac
-import hashlib
+import json
 from datetime import datetime, timezone
 import os
 import logging
@@ -19,6 +22,8 @@ logger = logging.getLogger(__name__)
 # Initialize Razorpay client
 razorpay_key_id = os.environ.get('RAZORPAY_KEY_ID', '')
 razorpay_key_secret = os.environ.get('RAZORPAY_KEY_SECRET', '')
+# HMAC key for signature checks, encoded once
+_razorpay_secret_bytes = razorpay_key_secret.encode('utf-8')
 
 if razorpay_key_id and razorpay_key_secret:
     razorpay_client = razorpay.Client(auth=(razorpay_key_id, razorpay_key_secret))
@@ -40,15 +45,35 @@ async def verify_razorpay_signature(order_id: str, payment_id: str, signature: s
     # Create signature verification string
     message = f"{order_id}|{payment_id}"
     
-    # Generate expected signature
-    expected_signature = hmac.new(
-        razorpay_key_secret.encode('utf-8'),
-        message.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
+    # Generate expected signature (one-shot OpenSSL HMAC, no HMAC object)
+    expected_signature = hmac.digest(_razorpay_secret_bytes, message.encode('utf-8'), 'sha256').hex()
     
     return hmac.compare_digest(expected_signature, signature)
 
+# Plans never change at runtime; serialize them once and serve the bytes
+_PLANS_RESPONSE = {
+    "plans": [
+        {
+            "type": "monthly",
+            "pricing": {
+                "CAD": {"amount": 1.99, "currency": "CAD", "symbol": "$"},
+                "INR": {"amount": 99, "currency": "INR", "symbol": "₹"}
+            },
+            "duration": "30 days"
+        },
+        {
+            "type": "yearly",
+            "pricing": {
+                "CAD": {"amount": 14.99, "currency": "CAD", "symbol": "$"},
+                "INR": {"amount": 799, "currency": "INR", "symbol": "₹"}
+            },
+            "duration": "365 days",
+            "savings": "Save 37%"
+        }
+    ]
+}
+_PLANS_BYTES = json.dumps(_PLANS_RESPONSE, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
 # Create router
 payment_router = APIRouter(prefix="/api/subscription", tags=["subscription"])
 
@@ -80,8 +105,8 @@ async def create_subscription_order(
     amount_in_cents = int(pricing['final_price'] * 100)
     
     try:
-        # Create Razorpay order
-        razorpay_order = razorpay_client.order.create({
+        # Create Razorpay order (blocking HTTPS, off the event loop)
+        razorpay_order = await run_in_threadpool(razorpay_client.order.create, {
             "amount": amount_in_cents,
             "currency": request.currency.value,
             "payment_capture": 1,
@@ -103,16 +128,15 @@ async def create_subscription_order(
         
         # Save to database
         payment_doc = payment.model_dump()
-        payment_doc['created_at'] = payment_doc['created_at'].isoformat()
         await service.db.payments.insert_one(payment_doc)
         
-        return {
+        return json_response({
             "order_id": razorpay_order['id'],
             "amount": amount_in_cents,
             "currency": request.currency.value,
             "key_id": razorpay_key_id,
             "pricing": pricing
-        }
+        }, exclude_none=False)
     
     except Exception as e:
         logger.error(f"Order creation failed: {str(e)}")
@@ -143,60 +167,62 @@ async def verify_subscription_payment(
         logger.warning(f"Invalid payment signature for business {request.business_id}")
         raise HTTPException(status_code=400, detail="Invalid payment signature")
     
-    # Check if payment record exists
-    payment_record = await service.db.payments.find_one(
-        {"razorpay_order_id": request.razorpay_order_id},
-        {"_id": 0}
-    )
-    
-    if not payment_record:
-        raise HTTPException(status_code=404, detail="Payment record not found")
-    
-    if payment_record['status'] == PaymentStatus.COMPLETED:
-        raise HTTPException(status_code=400, detail="Payment already processed")
-    
     try:
-        # Fetch payment details from Razorpay to double-check
-        payment_details = razorpay_client.payment.fetch(request.razorpay_payment_id)
+        # Fetch payment details from Razorpay to double-check (blocking HTTPS, off the event loop)
+        payment_details = await run_in_threadpool(razorpay_client.payment.fetch, request.razorpay_payment_id)
         
         if payment_details['status'] != 'captured':
             raise HTTPException(status_code=400, detail="Payment not captured")
         
-        # Update payment record
+        # Atomically claim the PENDING payment; concurrent or retried verify calls
+        # find nothing to claim, so the subscription is created only once. The
+        # subscription id is chosen up front so the claim also links the payment to it
         now = datetime.now(timezone.utc)
-        await service.db.payments.update_one(
-            {"razorpay_order_id": request.razorpay_order_id},
+        subscription_id = new_id()
+        payment_record = await service.db.payments.find_one_and_update(
+            {"razorpay_order_id": request.razorpay_order_id, "status": PaymentStatus.PENDING},
             {"$set": {
                 "razorpay_payment_id": request.razorpay_payment_id,
                 "razorpay_signature": request.razorpay_signature,
                 "status": PaymentStatus.COMPLETED,
-                "completed_at": now.isoformat()
-            }}
+                "completed_at": now,
+                "subscription_id": subscription_id
+            }},
+            projection={"_id": 0, "id": 1}
         )
         
-        # Create/extend subscription - THIS IS THE ONLY WAY TO GET ACCESS
-        subscription = await service.create_subscription(
-            business_id=request.business_id,
-            plan_type=request.plan_type,
-            currency=request.currency,
-            payment_id=payment_record['id'],
-            coupon_code=payment_details['notes'].get('coupon_code') if payment_details['notes'].get('coupon_code') != 'none' else None
-        )
+        if not payment_record:
+            # Rare path: tell a missing payment apart from one already processed
+            if await service.db.payments.count_documents({"razorpay_order_id": request.razorpay_order_id}, limit=1):
+                raise HTTPException(status_code=400, detail="Payment already processed")
+            raise HTTPException(status_code=404, detail="Payment record not found")
         
-        # Link payment to subscription
-        await service.db.payments.update_one(
-            {"razorpay_order_id": request.razorpay_order_id},
-            {"$set": {"subscription_id": subscription.id}}
-        )
+        try:
+            # Create/extend subscription - THIS IS THE ONLY WAY TO GET ACCESS
+            subscription = await service.create_subscription(
+                business_id=request.business_id,
+                plan_type=request.plan_type,
+                currency=request.currency,
+                payment_id=payment_record['id'],
+                coupon_code=payment_details['notes'].get('coupon_code') if payment_details['notes'].get('coupon_code') != 'none' else None,
+                subscription_id=subscription_id
+            )
+        except Exception:
+            # Release the claim so the payment can be verified again
+            await service.db.payments.update_one(
+                {"razorpay_order_id": request.razorpay_order_id},
+                {"$set": {"status": PaymentStatus.PENDING}, "$unset": {"completed_at": "", "subscription_id": ""}}
+            )
+            raise
         
         logger.info(f"Payment verified and subscription created for business {request.business_id}")
         
-        return {
+        return json_response({
             "success": True,
             "subscription_id": subscription.id,
-            "expiry_date": subscription.expiry_date.isoformat(),
+            "expiry_date": subscription.expiry_date,
             "message": "Subscription activated successfully"
-        }
+        }, exclude_none=False)
     
     except HTTPException:
         raise
@@ -221,40 +247,20 @@ async def apply_coupon(
     if pricing['discount'] == 0:
         raise HTTPException(status_code=400, detail="Invalid or expired coupon code")
     
-    return {
+    return json_response({
         "valid": True,
         "original_price": pricing['original_price'],
         "discount": pricing['discount'],
         "final_price": pricing['final_price'],
         "currency": pricing['currency']
-    }
+    }, exclude_none=False)
 
 @payment_router.get("/plans")
 async def get_subscription_plans():
     """
     Get all available subscription plans with pricing
     """
-    return {
-        "plans": [
-            {
-                "type": "monthly",
-                "pricing": {
-                    "CAD": {"amount": 1.99, "currency": "CAD", "symbol": "$"},
-                    "INR": {"amount": 99, "currency": "INR", "symbol": "₹"}
-                },
-                "duration": "30 days"
-            },
-            {
-                "type": "yearly",
-                "pricing": {
-                    "CAD": {"amount": 14.99, "currency": "CAD", "symbol": "$"},
-                    "INR": {"amount": 799, "currency": "INR", "symbol": "₹"}
-                },
-                "duration": "365 days",
-                "savings": "Save 37%"
-            }
-        ]
-    }
+    return Response(content=_PLANS_BYTES, media_type="application/json")
 
 @payment_router.get("/status/{business_id}")
 async def get_subscription_status(
@@ -268,16 +274,16 @@ async def get_subscription_status(
     subscription = await service.get_subscription_details(business_id)
     
     if not subscription:
-        return {
+        return json_response({
             "has_subscription": False,
             "status": "none",
             "message": "No active subscription"
-        }
+        }, exclude_none=False)
     
-    return {
+    return json_response({
         "has_subscription": True,
         **subscription
-    }
+    }, exclude_none=False)
 
 @payment_router.get("/payment-history/{business_id}")
 async def get_payment_history(
@@ -293,4 +299,4 @@ async def get_payment_history(
         {"_id": 0}
     ).sort("completed_at", -1).to_list(50)
     
-    return {"payments": payments}
+    return json_response({"payments": payments}, exclude_none=False)
@@ -1,34 +1,42 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Header, Response, Request
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
+import pydantic_core
+from cachetools import TTLCache
 from typing import List, Optional
 import uuid
+import hashlib
+from operator import itemgetter
 from datetime import datetime, timezone, timedelta
 import qrcode
 from io import BytesIO
 import base64
 import httpx
+from pymongo import ReturnDocument
 import razorpay
 
 # Import subscription system
 from subscription_service import SubscriptionService
 from payment_routes import payment_router
 from subscription_middleware import check_subscription_or_trial
-from google_business_service import GoogleBusinessService
+from google_business_service import GoogleBusinessService, invalidate_location_reviews, warm_api_clients
+from admin_models import request_clock, new_id, utcnow
+from admin_service import audit_flusher, stop_audit_flusher, ensure_indexes
+from db import client, get_db
+from business_cache import BUSINESS_PROJECTION, get_business_doc, invalidate_business
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection (shared pooled client)
+db = get_db()
 
 # Razorpay client
 razorpay_key_id = os.environ.get('RAZORPAY_KEY_ID', '')
@@ -38,17 +46,25 @@ if razorpay_key_id and razorpay_key_secret:
 else:
     razorpay_client = None
 
-app = FastAPI()
+class CoreJSONResponse(JSONResponse):
+    """JSONResponse encoded by pydantic-core (Rust) instead of the stdlib json module"""
+    def render(self, content) -> bytes:
+        return pydantic_core.to_json(content)
+
+app = FastAPI(default_response_class=CoreJSONResponse)
 
 # Store database in app state for dependency injection
 app.state.db = db
 
 api_router = APIRouter(prefix="/api")
 
+# Shared by all models below so the config object is built once
+_CFG = ConfigDict(extra="ignore")
+
 # Models
 class Business(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     name: str
     email: Optional[str] = None
     phone: Optional[str] = None
@@ -70,7 +86,7 @@ class Business(BaseModel):
     google_token_expires_at: Optional[datetime] = None
     google_account_name: Optional[str] = None
     google_location_name: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class BusinessCreate(BaseModel):
     name: str
@@ -93,23 +109,23 @@ class PaymentVerify(BaseModel):
     razorpay_signature: str
 
 class User(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    model_config = _CFG
     id: str
     email: str
     name: str
     picture: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class UserSession(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    model_config = _CFG
     user_id: str
     session_token: str
     expires_at: datetime
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class Review(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     business_id: str
     customer_email: str
     customer_name: str
@@ -117,7 +133,7 @@ class Review(BaseModel):
     keywords: str
     generated_review: str
     posted_to_google: bool = False
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class ReviewGenerate(BaseModel):
     rating: int
@@ -149,6 +165,17 @@ async def check_subscription_status(business: Business) -> bool:
     
     return False
 
+# Authenticated requests resolve the same session over and over; keep the user for a
+# short while, never past the session's own expiry. Logout evicts the entry on this
+# worker; other workers drop it once SESSION_CACHE_TTL runs out
+SESSION_CACHE_TTL = 60  # seconds
+
+_session_cache: TTLCache = TTLCache(maxsize=10000, ttl=SESSION_CACHE_TTL)
+
+def _session_key(session_token: str) -> bytes:
+    """Cache key for a session token (its SHA-256, so raw tokens are not kept around)"""
+    return hashlib.sha256(session_token.encode('utf-8')).digest()
+
 async def get_current_user(request: Request) -> Optional[User]:
     session_token = request.cookies.get("session_token")
     if not session_token:
@@ -159,18 +186,49 @@ async def get_current_user(request: Request) -> Optional[User]:
     if not session_token:
         return None
     
+    key = _session_key(session_token)
+    now = datetime.now(timezone.utc)
+    cached = _session_cache.get(key)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at > now:
+            return user
+        _session_cache.pop(key, None)
+    
+    # Sessions not yet converted by migrate_dates.py hold an ISO-string expires_at
     session = await db.user_sessions.find_one({
         "session_token": session_token,
-        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-    })
+        "$or": [{"expires_at": {"$gt": now}}, {"expires_at": {"$gt": now.isoformat()}}]
+    }, {"_id": 0, "user_id": 1, "expires_at": 1})
     
     if not session:
         return None
     
     user_doc = await db.users.find_one({"id": session["user_id"]}, {"_id": 0})
-    if user_doc and isinstance(user_doc.get('created_at'), str):
+    if not user_doc:
+        return None
+    if isinstance(user_doc.get('created_at'), str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
-    return User(**user_doc) if user_doc else None
+    
+    expires_at = session["expires_at"]
+    if isinstance(expires_at, str):
+        expires_at = datetime.fromisoformat(expires_at)
+    
+    # Trusted database read: skip re-validation
+    user = User.model_construct(**user_doc)
+    _session_cache[key] = (user, expires_at)
+    return user
+
+def render_qr_png(qr_url: str) -> bytes:
+    """Render a QR code for qr_url as PNG bytes"""
+    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    qr.add_data(qr_url)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
 
 # Routes
 @api_router.post("/business/register", response_model=Business)
@@ -183,38 +241,29 @@ async def register_business(input: BusinessCreate):
     business_obj.qr_code = qr_url
     
     doc = business_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    if doc.get('subscription_expires_at'):
-        doc['subscription_expires_at'] = doc['subscription_expires_at'].isoformat()
-    
+    # The QR payload is fixed at registration, so render the image once (CPU-bound,
+    # so off the event loop)
+    png = await run_in_threadpool(render_qr_png, qr_url)
+    doc['qr_png_b64'] = base64.b64encode(png).decode('ascii')
     await db.businesses.insert_one(doc)
     return business_obj
 
 @api_router.get("/business/{business_id}", response_model=Business)
 async def get_business(business_id: str):
-    business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+    business = await get_business_doc(db, business_id)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
-    if isinstance(business.get('created_at'), str):
-        business['created_at'] = datetime.fromisoformat(business['created_at'])
-    if isinstance(business.get('trial_ends_at'), str):
-        business['trial_ends_at'] = datetime.fromisoformat(business['trial_ends_at'])
-    if business.get('subscription_expires_at') and isinstance(business['subscription_expires_at'], str):
-        business['subscription_expires_at'] = datetime.fromisoformat(business['subscription_expires_at'])
-    
-    return Business(**business)
+    # Trusted database read: skip re-validation, and serialize the model directly
+    # rather than having FastAPI validate it against response_model again
+    business_obj = Business.model_construct(**business)
+    return Response(content=business_obj.model_dump_json(), media_type="application/json")
 
 @api_router.put("/business/{business_id}")
 async def update_business(business_id: str, request: Request):
     """Update business information"""
     data = await request.json()
     
-    # Check if business exists
-    business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-    
     # Prepare update data
     update_data = {}
     if 'name' in data and data['name']:
@@ -231,14 +280,16 @@ async def update_business(business_id: str, request: Request):
     if not update_data:
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
-    # Update business
-    await db.businesses.update_one(
+    # Update business and read it back in one round-trip
+    updated_business = await db.businesses.find_one_and_update(
         {"id": business_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection=BUSINESS_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
-    
-    # Get updated business
-    updated_business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+    if not updated_business:
+        raise HTTPException(status_code=404, detail="Business not found")
+    invalidate_business(business_id)
     
     return {"success": True, "business": updated_business}
 
@@ -248,7 +299,7 @@ async def create_payment_order(order: PaymentOrderCreate):
         raise HTTPException(status_code=500, detail="Payment gateway not configured. Please add Razorpay credentials.")
     
     # Verify business exists
-    business = await db.businesses.find_one({"id": order.business_id}, {"_id": 0})
+    business = await get_business_doc(db, order.business_id)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
@@ -269,6 +320,7 @@ async def create_payment_order(order: PaymentOrderCreate):
             {"id": order.business_id},
             {"$set": {"razorpay_order_id": razor_order["id"]}}
         )
+        invalidate_business(order.business_id)
         
         return {
             "order_id": razor_order["id"],
@@ -303,13 +355,14 @@ async def verify_payment(payment: PaymentVerify):
             {
                 "$set": {
                     "subscription_status": "active",
-                    "subscription_expires_at": subscription_expires_at.isoformat(),
+                    "subscription_expires_at": subscription_expires_at,
                     "razorpay_payment_id": payment.razorpay_payment_id,
                     "payment_id": payment.razorpay_payment_id,
                     "auto_renewal_enabled": True
                 }
             }
         )
+        invalidate_business(payment.business_id)
         
         return {
             "success": True,
@@ -321,16 +374,11 @@ async def verify_payment(payment: PaymentVerify):
 
 @api_router.get("/business/{business_id}/subscription-status")
 async def get_subscription_status(business_id: str):
-    business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+    business = await get_business_doc(db, business_id)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
-    if isinstance(business.get('trial_ends_at'), str):
-        business['trial_ends_at'] = datetime.fromisoformat(business['trial_ends_at'])
-    if business.get('subscription_expires_at') and isinstance(business['subscription_expires_at'], str):
-        business['subscription_expires_at'] = datetime.fromisoformat(business['subscription_expires_at'])
-    
-    business_obj = Business(**business)
+    business_obj = Business.model_construct(**business)
     is_active = await check_subscription_status(business_obj)
     
     now = datetime.now(timezone.utc)
@@ -351,8 +399,12 @@ async def get_subscription_status(business_id: str):
     }
 
 @api_router.get("/business/{business_id}/qr")
-async def get_qr_code(business_id: str):
-    business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+async def get_qr_code(business_id: str, request: Request):
+    # The cached business leaves out the image; load just the QR fields here
+    business = await db.businesses.find_one(
+        {"id": business_id},
+        {"_id": 0, "qr_code": 1, "qr_png_b64": 1}
+    )
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
@@ -365,37 +417,42 @@ async def get_qr_code(business_id: str):
             detail="Subscription expired or trial ended. Please purchase a subscription to access your QR code."
         )
     
-    # Generate QR code image
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(business['qr_code'])
-    qr.make(fit=True)
+    if business.get('qr_png_b64'):
+        png = base64.b64decode(business['qr_png_b64'])
+    else:
+        # Businesses registered before images were stored: render once and keep it
+        png = await run_in_threadpool(render_qr_png, business['qr_code'])
+        await db.businesses.update_one(
+            {"id": business_id},
+            {"$set": {"qr_png_b64": base64.b64encode(png).decode('ascii')}}
+        )
     
-    img = qr.make_image(fill_color="black", back_color="white")
-    buf = BytesIO()
-    img.save(buf, format='PNG')
-    buf.seek(0)
+    # Clients revalidate every time, so a lapsed subscription is enforced at once;
+    # an unchanged image costs only a 304
+    headers = {"Cache-Control": "no-cache", "ETag": f'"{hashlib.sha256(png).hexdigest()}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
     
-    return StreamingResponse(buf, media_type="image/png")
+    return Response(content=png, media_type="image/png", headers=headers)
 
 @api_router.post("/auth/session")
 async def create_session(data: SessionData, response: Response):
     session_id = data.session_id
     
     # Call Emergent auth service
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id},
-                timeout=10.0
-            )
-            resp.raise_for_status()
-            user_data = resp.json()
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Failed to validate session: {str(e)}")
+    try:
+        resp = await app.state.http.get(
+            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
+            headers={"X-Session-ID": session_id},
+            timeout=10.0
+        )
+        resp.raise_for_status()
+        user_data = resp.json()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to validate session: {str(e)}")
     
     # Check if user exists
-    existing_user = await db.users.find_one({"email": user_data["email"]}, {"_id": 0})
+    existing_user = await db.users.count_documents({"email": user_data["email"]}, limit=1)
     
     if not existing_user:
         # Create new user
@@ -405,9 +462,7 @@ async def create_session(data: SessionData, response: Response):
             name=user_data["name"],
             picture=user_data["picture"]
         )
-        user_doc = user.model_dump()
-        user_doc['created_at'] = user_doc['created_at'].isoformat()
-        await db.users.insert_one(user_doc)
+        await db.users.insert_one(user.model_dump())
     
     # Create session
     session_token = user_data["session_token"]
@@ -419,11 +474,7 @@ async def create_session(data: SessionData, response: Response):
         expires_at=expires_at
     )
     
-    session_doc = session.model_dump()
-    session_doc['expires_at'] = session_doc['expires_at'].isoformat()
-    session_doc['created_at'] = session_doc['created_at'].isoformat()
-    
-    await db.user_sessions.insert_one(session_doc)
+    await db.user_sessions.insert_one(session.model_dump())
     
     # Set cookie
     response.set_cookie(
@@ -443,12 +494,13 @@ async def get_me(request: Request):
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    return user
+    return Response(content=user.model_dump_json(), media_type="application/json")
 
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     session_token = request.cookies.get("session_token")
     if session_token:
+        _session_cache.pop(_session_key(session_token), None)
         await db.user_sessions.delete_one({"session_token": session_token})
     
     response.delete_cookie("session_token", path="/")
@@ -463,7 +515,7 @@ async def initiate_google_auth(business_id: str):
     """Initiate Google OAuth flow for business verification"""
     try:
         # Verify business exists
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -485,10 +537,10 @@ async def google_auth_callback(code: str, state: str):
         business_id = state
         
         # Exchange code for tokens
-        tokens = google_service.exchange_code_for_tokens(code)
+        tokens = await google_service.exchange_code_for_tokens(code)
         
         # Fetch Google accounts
-        accounts = google_service.get_business_accounts(tokens['access_token'])
+        accounts = await google_service.get_business_accounts(tokens['access_token'])
         
         if not accounts:
             raise HTTPException(status_code=404, detail="No Google Business accounts found. Please create a Google Business Profile first.")
@@ -509,6 +561,7 @@ async def google_auth_callback(code: str, state: str):
             {"id": business_id},
             {"$set": update_data}
         )
+        invalidate_business(business_id)
         
         # Redirect to dashboard with success
         frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
@@ -544,17 +597,17 @@ async def google_auth_callback(code: str, state: str):
         )
 
 @api_router.get("/google/accounts/{business_id}")
-async def get_google_accounts(business_id: str):
+async def get_google_accounts(business_id: str, refresh: bool = False):
     """Fetch Google Business accounts for a business"""
     try:
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
         if not business.get('google_verified') or not business.get('google_access_token'):
             raise HTTPException(status_code=403, detail="Business not verified with Google")
         
-        accounts = google_service.get_business_accounts(business['google_access_token'])
+        accounts = await google_service.get_business_accounts(business['google_access_token'], force_refresh=refresh)
         
         return {
             "success": True,
@@ -573,6 +626,7 @@ async def select_google_account(business_id: str, account_name: str):
             {"id": business_id},
             {"$set": {"google_account_name": account_name}}
         )
+        invalidate_business(business_id)
         
         return {"success": True, "message": "Account selected successfully"}
     except Exception as e:
@@ -580,10 +634,10 @@ async def select_google_account(business_id: str, account_name: str):
         raise HTTPException(status_code=500, detail="Failed to select account")
 
 @api_router.get("/google/locations/{business_id}")
-async def get_google_locations(business_id: str):
+async def get_google_locations(business_id: str, refresh: bool = False):
     """Fetch Google Business locations for a business"""
     try:
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -593,9 +647,10 @@ async def get_google_locations(business_id: str):
         if not business.get('google_account_name'):
             raise HTTPException(status_code=400, detail="Please select a Google Business account first")
         
-        locations = google_service.get_business_locations(
+        locations = await google_service.get_business_locations(
             business['google_access_token'],
-            business['google_account_name']
+            business['google_account_name'],
+            force_refresh=refresh
         )
         
         return {
@@ -615,6 +670,7 @@ async def select_google_location(business_id: str, location_name: str):
             {"id": business_id},
             {"$set": {"google_location_name": location_name}}
         )
+        invalidate_business(business_id)
         
         return {"success": True, "message": "Location selected successfully"}
     except Exception as e:
@@ -622,10 +678,10 @@ async def select_google_location(business_id: str, location_name: str):
         raise HTTPException(status_code=500, detail="Failed to select location")
 
 @api_router.get("/google/reviews/{business_id}")
-async def get_google_reviews(business_id: str, page_size: int = 50):
+async def get_google_reviews(business_id: str, page_size: int = 50, refresh: bool = False):
     """Fetch Google reviews for a business location"""
     try:
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -635,10 +691,11 @@ async def get_google_reviews(business_id: str, page_size: int = 50):
         if not business.get('google_location_name'):
             raise HTTPException(status_code=400, detail="Please select a Google Business location first")
         
-        reviews_data = google_service.get_location_reviews(
+        reviews_data = await google_service.get_location_reviews(
             business['google_access_token'],
             business['google_location_name'],
-            page_size
+            page_size,
+            force_refresh=refresh
         )
         
         return {
@@ -650,6 +707,14 @@ async def get_google_reviews(business_id: str, page_size: int = 50):
         raise HTTPException(status_code=500, detail=f"Failed to fetch Google reviews: {str(e)}")
 
 
+# sort_by value -> (sort key, descending) for the filtered reviews endpoint
+REVIEW_SORTS = {
+    "newest": (itemgetter('create_time'), True),
+    "oldest": (itemgetter('create_time'), False),
+    "highest": (itemgetter('rating'), True),
+    "lowest": (itemgetter('rating'), False),
+}
+
 @api_router.get("/google/reviews-filtered/{business_id}")
 async def get_google_reviews_filtered(
     business_id: str,
@@ -657,11 +722,12 @@ async def get_google_reviews_filtered(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     keyword: Optional[str] = None,
-    sort_by: str = "newest"
+    sort_by: str = "newest",
+    refresh: bool = False
 ):
     """Fetch filtered and sorted Google reviews"""
     try:
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -672,37 +738,28 @@ async def get_google_reviews_filtered(
             raise HTTPException(status_code=400, detail="Please select a Google Business location first")
         
         # Fetch all reviews
-        reviews_data = google_service.get_location_reviews(
+        reviews_data = await google_service.get_location_reviews(
             business['google_access_token'],
             business['google_location_name'],
-            100  # Fetch more for filtering
+            100,  # Fetch more for filtering
+            force_refresh=refresh
         )
         
-        reviews = reviews_data['reviews']
-        
-        # Apply filters
-        if rating_filter:
-            reviews = [r for r in reviews if r['rating'] == rating_filter]
-        
-        if date_from:
-            reviews = [r for r in reviews if r['create_time'] >= date_from]
-        
-        if date_to:
-            reviews = [r for r in reviews if r['create_time'] <= date_to]
-        
-        if keyword:
-            keyword_lower = keyword.lower()
-            reviews = [r for r in reviews if keyword_lower in r['comment'].lower()]
+        # Apply all filters in one pass; this also builds a fresh list, so the shared
+        # cached list is never sorted in place
+        keyword_lower = keyword.lower() if keyword else None
+        reviews = [
+            r for r in reviews_data['reviews']
+            if (not rating_filter or r['rating'] == rating_filter)
+            and (not date_from or r['create_time'] >= date_from)
+            and (not date_to or r['create_time'] <= date_to)
+            and (not keyword_lower or keyword_lower in r['comment'].lower())
+        ]
         
         # Apply sorting
-        if sort_by == "newest":
-            reviews.sort(key=lambda x: x['create_time'], reverse=True)
-        elif sort_by == "oldest":
-            reviews.sort(key=lambda x: x['create_time'])
-        elif sort_by == "highest":
-            reviews.sort(key=lambda x: x['rating'], reverse=True)
-        elif sort_by == "lowest":
-            reviews.sort(key=lambda x: x['rating'])
+        if sort_by in REVIEW_SORTS:
+            sort_key, reverse = REVIEW_SORTS[sort_by]
+            reviews.sort(key=sort_key, reverse=reverse)
         
         return {
             "success": True,
@@ -716,10 +773,10 @@ async def get_google_reviews_filtered(
         raise HTTPException(status_code=500, detail=f"Failed to fetch filtered reviews: {str(e)}")
 
 @api_router.get("/google/keywords/{business_id}")
-async def get_review_keywords(business_id: str):
+async def get_review_keywords(business_id: str, refresh: bool = False):
     """Extract keywords and insights from reviews"""
     try:
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -730,27 +787,32 @@ async def get_review_keywords(business_id: str):
             raise HTTPException(status_code=400, detail="Please select a Google Business location first")
         
         # Fetch reviews
-        reviews_data = google_service.get_location_reviews(
+        reviews_data = await google_service.get_location_reviews(
             business['google_access_token'],
             business['google_location_name'],
-            100
+            100,
+            force_refresh=refresh
         )
         
         # Extract keywords
         keywords = google_service.extract_keywords(reviews_data['reviews'])
         
-        # Calculate insights
+        # Calculate insights and pick complaints/praise in a single pass
         total_reviews = len(reviews_data['reviews'])
-        positive_reviews = len([r for r in reviews_data['reviews'] if r['rating'] >= 4])
-        negative_reviews = len([r for r in reviews_data['reviews'] if r['rating'] <= 2])
+        positive_reviews = negative_reviews = 0
+        highlighted_reviews = {'complaints': [], 'praise': []}
+        for r in reviews_data['reviews']:
+            rating = r['rating']
+            if rating >= 4:
+                positive_reviews += 1
+                if rating == 5 and len(highlighted_reviews['praise']) < 5:
+                    highlighted_reviews['praise'].append(r)
+            elif rating <= 2:
+                negative_reviews += 1
+                if len(highlighted_reviews['complaints']) < 5:
+                    highlighted_reviews['complaints'].append(r)
         neutral_reviews = total_reviews - positive_reviews - negative_reviews
         
-        # Find reviews with common complaints/praise
-        highlighted_reviews = {
-            'complaints': [r for r in reviews_data['reviews'] if r['rating'] <= 2][:5],
-            'praise': [r for r in reviews_data['reviews'] if r['rating'] == 5][:5]
-        }
-        
         return {
             "success": True,
             "keywords": keywords,
@@ -769,10 +831,10 @@ async def get_review_keywords(business_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to extract keywords: {str(e)}")
 
 @api_router.get("/google/metrics/{business_id}")
-async def get_review_metrics(business_id: str):
+async def get_review_metrics(business_id: str, refresh: bool = False):
     """Get rating trends and metrics"""
     try:
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -783,10 +845,11 @@ async def get_review_metrics(business_id: str):
             raise HTTPException(status_code=400, detail="Please select a Google Business location first")
         
         # Fetch reviews
-        reviews_data = google_service.get_location_reviews(
+        reviews_data = await google_service.get_location_reviews(
             business['google_access_token'],
             business['google_location_name'],
-            100
+            100,
+            force_refresh=refresh
         )
         
         reviews = reviews_data['reviews']
@@ -805,15 +868,16 @@ async def get_review_metrics(business_id: str):
         recent_reviews = []
         previous_reviews = []
         
+        from_iso = datetime.fromisoformat
         for review in reviews:
             try:
-                review_date = datetime.fromisoformat(review['create_time'].replace('Z', '+00:00'))
-                if review_date >= thirty_days_ago:
-                    recent_reviews.append(review)
-                elif review_date >= sixty_days_ago:
-                    previous_reviews.append(review)
-            except:
-                pass
+                review_date = from_iso(review['create_time'].replace('Z', '+00:00'))
+            except (ValueError, AttributeError):
+                continue
+            if review_date >= thirty_days_ago:
+                recent_reviews.append(review)
+            elif review_date >= sixty_days_ago:
+                previous_reviews.append(review)
         
         recent_avg = sum(r['rating'] for r in recent_reviews) / len(recent_reviews) if recent_reviews else 0
         previous_avg = sum(r['rating'] for r in previous_reviews) / len(previous_reviews) if previous_reviews else 0
@@ -897,36 +961,36 @@ Business name: {business_name}
 Keep it professional, understanding, and solution-focused."""
         
         # Call OpenAI API
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful assistant that writes professional business review responses."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 200
-                }
-            )
+        response = await app.state.http.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {openai_api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-4o-mini",
+                "messages": [
+                    {"role": "system", "content": "You are a helpful assistant that writes professional business review responses."},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.7,
+                "max_tokens": 200
+            },
+            timeout=30.0
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            suggested_reply = result['choices'][0]['message']['content'].strip()
             
-            if response.status_code == 200:
-                result = response.json()
-                suggested_reply = result['choices'][0]['message']['content'].strip()
-                
-                return {
-                    "success": True,
-                    "suggested_reply": suggested_reply
-                }
-            else:
-                error_detail = response.text
-                logger.error(f"OpenAI API error: {error_detail}")
-                raise HTTPException(status_code=500, detail=f"Failed to generate reply: {error_detail}")
+            return {
+                "success": True,
+                "suggested_reply": suggested_reply
+            }
+        else:
+            error_detail = response.text
+            logger.error(f"OpenAI API error: {error_detail}")
+            raise HTTPException(status_code=500, detail=f"Failed to generate reply: {error_detail}")
                 
     except Exception as e:
         logger.error(f"Error generating AI reply: {str(e)}")
@@ -942,7 +1006,7 @@ async def post_review_reply(business_id: str, review_id: str, request: Request):
         if not reply_text:
             raise HTTPException(status_code=400, detail="Reply text is required")
         
-        business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
+        business = await get_business_doc(db, business_id)
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
         
@@ -974,7 +1038,7 @@ async def post_review_reply(business_id: str, review_id: str, request: Request):
         # Post reply to Google using Business Profile Performance API
         try:
             from google.oauth2.credentials import Credentials
-            from googleapiclient.discovery import build
+            from google_business_service import api_client, authorized_http
             
             credentials = Credentials(
                 token=business['google_access_token'],
@@ -985,7 +1049,7 @@ async def post_review_reply(business_id: str, review_id: str, request: Request):
             )
             
             # Use Business Profile Performance API (newer version)
-            service = build('mybusinessbusinessinformation', 'v1', credentials=credentials)
+            service = await api_client('mybusinessbusinessinformation', 'v1')
             
             # Update review reply
             review_name = f"{business['google_location_name']}/reviews/{review_id}"
@@ -994,10 +1058,12 @@ async def post_review_reply(business_id: str, review_id: str, request: Request):
             }
             
             # Try to update the reply
-            service.accounts().locations().reviews().updateReply(
+            reply_request = service.accounts().locations().reviews().updateReply(
                 name=review_name,
                 body=reply_body
-            ).execute()
+            )
+            await run_in_threadpool(reply_request.execute, http=authorized_http(credentials))
+            invalidate_location_reviews(business['google_location_name'])
             
             # Store successful reply in database
             reply_record = {
@@ -1105,26 +1171,25 @@ Generate the review now."""
             request_payload["max_completion_tokens"] = 100
             request_payload["temperature"] = 0.7
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json=request_payload,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                error_detail = response.json().get('error', {}).get('message', 'Unknown error')
-                logger.error(f"OpenAI API error: {error_detail}")
-                raise HTTPException(status_code=500, detail=f"AI service error: {error_detail}")
-            
-            result = response.json()
-            generated_review = result["choices"][0]["message"]["content"].strip()
-            
-            return {"generated_review": generated_review}
+        response = await app.state.http.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json=request_payload,
+            timeout=30.0
+        )
+        
+        if response.status_code != 200:
+            error_detail = response.json().get('error', {}).get('message', 'Unknown error')
+            logger.error(f"OpenAI API error: {error_detail}")
+            raise HTTPException(status_code=500, detail=f"AI service error: {error_detail}")
+        
+        result = response.json()
+        generated_review = result["choices"][0]["message"]["content"].strip()
+        
+        return {"generated_review": generated_review}
     
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="AI service timeout. Please try again.")
@@ -1139,15 +1204,15 @@ async def submit_review(input: ReviewSubmit, request: Request):
         raise HTTPException(status_code=401, detail="Please login with Google to submit review")
     
     # Verify business exists
-    business = await db.businesses.find_one({"id": input.business_id}, {"_id": 0})
+    business = await db.businesses.find_one({"id": input.business_id}, {"_id": 1})
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
     # Check if user has already reviewed this business
-    existing_review = await db.reviews.find_one({
+    existing_review = await db.reviews.count_documents({
         "business_id": input.business_id,
         "customer_email": user.email
-    }, {"_id": 0})
+    }, limit=1)
     
     if existing_review:
         raise HTTPException(
@@ -1190,25 +1255,19 @@ async def create_ticket(ticket_data: dict):
     from admin_models import SupportTicket, TicketStatus, TicketPriority, Notification, NotificationType
     
     # Get business details
-    business = await db.businesses.find_one({"id": ticket_data['business_id']}, {"_id": 0})
+    business = await get_business_doc(db, ticket_data['business_id'])
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
     ticket = SupportTicket(
         business_id=ticket_data['business_id'],
-        business_name=business.get('name', 'Unknown'),
-        business_email=business.get('owner_email') or business.get('email', ''),
         subject=ticket_data['subject'],
         description=ticket_data['description'],
         priority=ticket_data.get('priority', 'medium'),
         status=TicketStatus.OPEN
     )
     
-    ticket_doc = ticket.model_dump()
-    ticket_doc['created_at'] = ticket_doc['created_at'].isoformat()
-    ticket_doc['updated_at'] = ticket_doc['updated_at'].isoformat()
-    
-    await db.support_tickets.insert_one(ticket_doc)
+    await db.support_tickets.insert_one(ticket.model_dump())
     
     # Create notification for admin
     notification = Notification(
@@ -1219,9 +1278,7 @@ async def create_ticket(ticket_data: dict):
         related_id=ticket.id
     )
     
-    notif_doc = notification.model_dump()
-    notif_doc['created_at'] = notif_doc['created_at'].isoformat()
-    await db.notifications.insert_one(notif_doc)
+    await db.notifications.insert_one(notification.to_dict())
     
     return {"success": True, "ticket_id": ticket.id, "message": "Support ticket created successfully"}
 
@@ -1244,6 +1301,15 @@ from tag_pair_routes import tag_pair_router
 app.include_router(admin_router)  # Include admin panel routes
 app.include_router(tag_pair_router)  # Include tag pair management routes
 
+@app.middleware("http")
+async def pin_request_clock(request: Request, call_next):
+    """Pin one timestamp per request so model defaults share a single clock read"""
+    token = request_clock.set(datetime.now(timezone.utc))
+    try:
+        return await call_next(request)
+    finally:
+        request_clock.reset(token)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1258,6 +1324,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_audit_flusher():
+    app.state.audit_flusher = asyncio.create_task(audit_flusher(db))
+
+@app.on_event("startup")
+async def open_http_client():
+    # One pooled client for outbound calls (auth service, OpenAI), so connections
+    # and TLS sessions are reused instead of re-handshaking on every request
+    app.state.http = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+    )
+
+@app.on_event("startup")
+async def build_google_clients():
+    # Discovery fetches run in the background so a slow Google doesn't hold up startup
+    app.state.google_clients = asyncio.create_task(warm_api_clients())
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Queued audit and tag history rows are written before the client closes
+    await stop_audit_flusher(app.state.audit_flusher, db)
+    await app.state.http.aclose()
     client.close()
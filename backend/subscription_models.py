@@ -3,9 +3,9 @@
 
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
 from typing import Optional, List
-from datetime import datetime, timezone
+from datetime import datetime
 from enum import Enum
-import uuid
+from admin_models import new_id, utcnow, Email
 
 # Enums
 class SubscriptionStatus(str, Enum):
@@ -40,27 +40,30 @@ PRICING = {
     }
 }
 
+# Shared by all models below so the config object is built once
+_CFG = ConfigDict(extra="ignore")
+
 # Database Schema Models
 
 class BusinessRegistration(BaseModel):
     """Enhanced business registration with full details"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     name: str
-    email: EmailStr
+    email: Email
     phone: str
     address: str
     category: str  # e.g., Restaurant, Cafe, Retail, Services
     google_place_id: str
-    owner_email: EmailStr
+    owner_email: Email
     qr_code: Optional[str] = None
     verified: bool = False
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class Subscription(BaseModel):
     """Subscription details with expiry tracking"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     business_id: str
     plan_type: PlanType
     currency: Currency
@@ -71,13 +74,13 @@ class Subscription(BaseModel):
     auto_renewal: bool = False
     trial_used: bool = False
     notified_7days: bool = False  # Track if 7-day expiry email sent
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
 class Payment(BaseModel):
     """Payment transaction record"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     business_id: str
     subscription_id: Optional[str] = None
     amount: float
@@ -86,13 +89,13 @@ class Payment(BaseModel):
     razorpay_payment_id: Optional[str] = None
     razorpay_signature: Optional[str] = None
     status: PaymentStatus = PaymentStatus.PENDING
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
     completed_at: Optional[datetime] = None
 
 class Coupon(BaseModel):
     """Discount coupon for subscriptions"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     code: str  # e.g., LAUNCH50, NEWYEAR2025
     discount_type: str  # "percentage" or "fixed"
     discount_value: float  # 50 for 50% or 100 for ₹100 off
@@ -101,17 +104,17 @@ class Coupon(BaseModel):
     usage_limit: int = 0  # 0 = unlimited
     used_count: int = 0
     active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
 
 class CouponUsage(BaseModel):
     """Track coupon usage to prevent abuse"""
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = _CFG
+    id: str = Field(default_factory=new_id)
     coupon_id: str
     business_id: str
     subscription_id: str
     discount_amount: float
-    used_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    used_at: datetime = Field(default_factory=utcnow)
 
 # Request/Response Models
 
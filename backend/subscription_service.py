@@ -6,6 +6,7 @@ from typing import Optional, Dict, Any, List
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+from admin_models import new_id
 from subscription_models import (
     Subscription, SubscriptionStatus, PlanType, Currency,
     Payment, PaymentStatus, Coupon, CouponUsage, PRICING
@@ -88,8 +89,8 @@ class SubscriptionService:
             "currency": subscription['currency'],
             "amount": subscription['amount'],
             "status": subscription['status'],
-            "start_date": subscription['start_date'].isoformat(),
-            "expiry_date": subscription['expiry_date'].isoformat(),
+            "start_date": subscription['start_date'],
+            "expiry_date": subscription['expiry_date'],
             "days_remaining": max(0, days_remaining),
             "is_active": await self.check_subscription_active(business_id)
         }
@@ -142,10 +143,11 @@ class SubscriptionService:
             "currency": currency.value
         }
     
-    async def create_subscription(self, business_id: str, plan_type: PlanType, currency: Currency, payment_id: str, coupon_code: Optional[str] = None) -> Subscription:
+    async def create_subscription(self, business_id: str, plan_type: PlanType, currency: Currency, payment_id: str, coupon_code: Optional[str] = None, subscription_id: Optional[str] = None) -> Subscription:
         """
         Create new subscription or extend existing one
-        Called after successful payment verification
+        Called after successful payment verification; subscription_id presets the new
+        subscription's id so the caller can record it before the insert
         """
         pricing = await self.calculate_price(plan_type, currency, coupon_code)
         
@@ -183,6 +185,7 @@ class SubscriptionService:
         
         # Create subscription
         subscription = Subscription(
+            id=subscription_id or new_id(),
             business_id=business_id,
             plan_type=plan_type,
             currency=currency,
@@ -2,9 +2,14 @@
 
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
-from datetime import datetime, timezone
-import uuid
+from datetime import datetime
+import os
 from enum import Enum
+from admin_models import new_id, utcnow
+
+def new_pair_id() -> str:
+    """Short pair identifier, e.g. PAIR-1A2B3C4D"""
+    return f"PAIR-{os.urandom(4).hex().upper()}"
 
 class TagPairStatus(str, Enum):
     UNASSIGNED = "unassigned"  # Pair created but not assigned to business
@@ -13,11 +18,14 @@ class TagPairStatus(str, Enum):
     INACTIVE = "inactive"      # Deactivated but can be reactivated
     DELETED = "deleted"        # Soft deleted
 
+# Shared by all models below so the config object is built once
+_CFG = ConfigDict(extra="ignore")
+
 class TagPair(BaseModel):
     """QR & NFC Tag Pair Model"""
-    model_config = ConfigDict(extra="ignore")
+    model_config = _CFG
     
-    pair_id: str = Field(default_factory=lambda: f"PAIR-{uuid.uuid4().hex[:8].upper()}")
+    pair_id: str = Field(default_factory=new_pair_id)
     qr_id: str  # QR code ID
     nfc_id: str  # NFC tag ID
     status: TagPairStatus = TagPairStatus.UNASSIGNED
@@ -35,8 +43,8 @@ class TagPair(BaseModel):
     
     # Metadata
     notes: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
 class TagPairCreate(BaseModel):
     """Request model for creating tag pairs"""
@@ -63,14 +71,14 @@ class TagPairUpdate(BaseModel):
 
 class TagPairActivityLog(BaseModel):
     """Activity log for tag pair actions"""
-    model_config = ConfigDict(extra="ignore")
+    model_config = _CFG
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     pair_id: str
     action: str  # Assign, Reassign, Activate, Deactivate, Delete
     performed_by: str  # Admin email
     previous_state: Optional[dict] = None
     new_state: Optional[dict] = None
     notes: Optional[str] = None
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: datetime = Field(default_factory=utcnow)
     ip_address: Optional[str] = None
@@ -6,7 +6,9 @@ from tag_pair_models import (
     TagPairUpdate, TagPairActivityLog, TagPairStatus
 )
 from admin_service import AdminService
+from business_cache import BUSINESS_PROJECTION
 from datetime import datetime, timezone
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,13 +53,14 @@ async def create_tag_pair(
     service: AdminService = Depends(get_admin_service)
 ):
     """Create a new QR-NFC tag pair"""
-    # Check if QR ID or NFC ID already exists
-    existing_qr = await service.db.tag_pairs.find_one({"qr_id": pair_data.qr_id}, {"_id": 0})
-    if existing_qr:
-        raise HTTPException(status_code=400, detail=f"QR ID {pair_data.qr_id} already exists")
-    
-    existing_nfc = await service.db.tag_pairs.find_one({"nfc_id": pair_data.nfc_id}, {"_id": 0})
-    if existing_nfc:
+    # Check if QR ID or NFC ID already exists (one lookup, only the IDs fetched)
+    existing = await service.db.tag_pairs.find_one(
+        {"$or": [{"qr_id": pair_data.qr_id}, {"nfc_id": pair_data.nfc_id}]},
+        {"_id": 0, "qr_id": 1}
+    )
+    if existing:
+        if existing.get("qr_id") == pair_data.qr_id:
+            raise HTTPException(status_code=400, detail=f"QR ID {pair_data.qr_id} already exists")
         raise HTTPException(status_code=400, detail=f"NFC ID {pair_data.nfc_id} already exists")
     
     # Create tag pair
@@ -96,6 +99,15 @@ async def bulk_create_tag_pairs(
     created_pairs = []
     skipped_pairs = []
     
+    # Existing IDs for the whole batch up front; membership is then checked in memory
+    qr_ids = [p.get("qr_id") for p in bulk_data.pairs if p.get("qr_id")]
+    nfc_ids = [p.get("nfc_id") for p in bulk_data.pairs if p.get("nfc_id")]
+    existing_qr_ids, existing_nfc_ids = await asyncio.gather(
+        service.db.tag_pairs.distinct("qr_id", {"qr_id": {"$in": qr_ids}}),
+        service.db.tag_pairs.distinct("nfc_id", {"nfc_id": {"$in": nfc_ids}})
+    )
+    existing_qr_ids, existing_nfc_ids = set(existing_qr_ids), set(existing_nfc_ids)
+    
     for pair_data in bulk_data.pairs:
         qr_id = pair_data.get("qr_id")
         nfc_id = pair_data.get("nfc_id")
@@ -104,14 +116,12 @@ async def bulk_create_tag_pairs(
             skipped_pairs.append({"reason": "Missing QR or NFC ID", "data": pair_data})
             continue
         
-        # Check duplicates
-        existing = await service.db.tag_pairs.find_one(
-            {"$or": [{"qr_id": qr_id}, {"nfc_id": nfc_id}]},
-            {"_id": 0}
-        )
-        if existing:
+        # Check duplicates, including earlier rows of this batch
+        if qr_id in existing_qr_ids or nfc_id in existing_nfc_ids:
             skipped_pairs.append({"reason": "Duplicate ID", "data": pair_data})
             continue
+        existing_qr_ids.add(qr_id)
+        existing_nfc_ids.add(nfc_id)
         
         # Create pair
         tag_pair = TagPair(qr_id=qr_id, nfc_id=nfc_id)
@@ -194,7 +204,7 @@ async def assign_tag_pair(
         raise HTTPException(status_code=400, detail=f"Tag pair is {pair['status']}, cannot assign")
     
     # Get business
-    business = await service.db.businesses.find_one({"id": assignment.business_id}, {"_id": 0})
+    business = await service.db.businesses.find_one({"id": assignment.business_id}, BUSINESS_PROJECTION)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
@@ -240,7 +250,7 @@ async def reassign_tag_pair(
         raise HTTPException(status_code=404, detail="Tag pair not found")
     
     # Get business
-    business = await service.db.businesses.find_one({"id": assignment.business_id}, {"_id": 0})
+    business = await service.db.businesses.find_one({"id": assignment.business_id}, BUSINESS_PROJECTION)
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
@@ -0,0 +1,41 @@
+"""
+Shared fixtures: backend modules are imported from backend/ and run against an
+in-memory mongomock database, so no MongoDB server is needed
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# db.py reads these at import; nothing connects to this URL
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "revio_test")
+
+from mongomock_motor import AsyncMongoMockClient
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def db():
+    """Fresh in-memory database (tz-aware, like the real client)"""
+    return AsyncMongoMockClient(tz_aware=True)["revio_test"]
+
+class FakeRequest:
+    """Just enough of a Starlette request for handlers that read the body or client"""
+
+    def __init__(self, body: dict = None, host: str = "127.0.0.1"):
+        self._body = body or {}
+        self.client = type("Client", (), {"host": host})()
+
+    async def json(self):
+        return self._body
+
+@pytest.fixture
+def fake_request():
+    return FakeRequest
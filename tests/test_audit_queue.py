@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import admin_service
+from admin_service import audit_flusher, record_audit, record_tag_history, stop_audit_flusher
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(autouse=True)
+def fresh_queue(monkeypatch):
+    # asyncio queues bind to the first loop that waits on them; each test has its own
+    monkeypatch.setattr(admin_service, "_audit_queue", asyncio.Queue(maxsize=admin_service.AUDIT_QUEUE_SIZE))
+
+def audit_row(n: int) -> dict:
+    return {"id": f"log-{n}", "action": "tag_created", "entity_type": "tag", "entity_id": f"QR-{n}"}
+
+async def test_shutdown_writes_rows_still_queued(db):
+    flusher = asyncio.create_task(audit_flusher(db))
+    for n in range(250):
+        record_audit(audit_row(n))
+    record_tag_history({"id": "h-1", "action": "created", "tag_id": "QR-1"})
+
+    await stop_audit_flusher(flusher, db)
+
+    assert flusher.cancelled()
+    assert await db.audit_logs.count_documents({}) == 250
+    assert await db.tag_history.count_documents({}) == 1
+
+async def test_shutdown_writes_the_batch_being_collected(db):
+    flusher = asyncio.create_task(audit_flusher(db))
+    record_audit(audit_row(1))
+    # The flusher has taken the row and is waiting for more within the flush window
+    await asyncio.sleep(admin_service.AUDIT_FLUSH_INTERVAL / 5)
+    assert admin_service._audit_queue.empty()
+
+    await stop_audit_flusher(flusher, db)
+
+    assert await db.audit_logs.count_documents({"id": "log-1"}) == 1
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import admin_routes
+from admin_models import Tag, TagAdapter, TagCreateRequest
+from admin_service import AdminService
+
+pytestmark = pytest.mark.anyio
+
+ADMIN = SimpleNamespace(id="admin-1", email="admin@example.com")
+
+@pytest.fixture
+async def tags_db(db):
+    await db.tags.create_index("tag_id", unique=True)
+    return db
+
+def tag_doc(tag_id: str) -> dict:
+    return TagAdapter.dump_python(Tag(tag_id=tag_id, tag_type="qr"))
+
+async def test_insert_new_tags_reports_duplicates(tags_db):
+    await tags_db.tags.insert_one(tag_doc("QR-TAKEN"))
+
+    duplicates = await admin_routes.insert_new_tags(
+        tags_db, [tag_doc("QR-NEW1"), tag_doc("QR-TAKEN"), tag_doc("QR-NEW2")], ADMIN
+    )
+
+    assert duplicates == {"QR-TAKEN"}
+    # No "created" history for the rejected tag
+    assert sorted(await tags_db.tag_history.distinct("tag_id")) == ["QR-NEW1", "QR-NEW2"]
+
+async def test_create_tags_rolls_back_when_an_id_is_taken_concurrently(tags_db, monkeypatch):
+    # Deterministic IDs: QR-00000001, QR-00000002, QR-00000003
+    monkeypatch.setattr(admin_routes.os, "urandom", lambda n: b"".join(i.to_bytes(4, "big") for i in range(1, n // 4 + 1)))
+    real_insert = admin_routes.insert_new_tags
+
+    async def insert_after_concurrent_create(db, tag_docs, admin):
+        # Another request takes one ID between the up-front check and the insert
+        await db.tags.insert_one(tag_doc("QR-00000002"))
+        return await real_insert(db, tag_docs, admin)
+    monkeypatch.setattr(admin_routes, "insert_new_tags", insert_after_concurrent_create)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await admin_routes.create_tags(TagCreateRequest(tag_type="qr", quantity=3), ADMIN, AdminService(tags_db))
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Tag ID QR-00000002 already exists"
+    # Only the concurrently created tag remains; none of this batch was kept
+    assert await tags_db.tags.distinct("tag_id") == ["QR-00000002"]
+    assert await tags_db.tag_history.count_documents({}) == 0
+
+async def test_create_tags_inserts_the_whole_batch(tags_db):
+    result = await admin_routes.create_tags(TagCreateRequest(tag_type="nfc", quantity=3), ADMIN, AdminService(tags_db))
+
+    assert result["success"] is True
+    assert await tags_db.tags.count_documents({"tag_type": "nfc"}) == 3
+    assert await tags_db.tag_history.count_documents({"action": "created"}) == 3
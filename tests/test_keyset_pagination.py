@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from admin_routes import EPOCH, get_tag_history, keyset_filter
+from admin_service import AdminService
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2024, 3, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)
+
+def history_row(row_id: str, created_at) -> dict:
+    return {"id": row_id, "tag_id": "QR-1", "action": "assigned", "created_at": created_at}
+
+async def all_pages(db, limit: int) -> list:
+    """Follow next_cursor from the first page to the last; returns the ids of each page"""
+    pages, before = [], None
+    while True:
+        page = await get_tag_history("QR-1", before=before, limit=limit, admin=None, service=AdminService(db))
+        pages.append([row["id"] for row in page["history"]])
+        before = page["next_cursor"]
+        if before is None:
+            return pages
+
+async def test_ties_on_created_at_are_broken_by_id(db):
+    await db.tag_history.insert_many([history_row(row_id, T0) for row_id in "abcde"])
+
+    assert await all_pages(db, limit=2) == [["e", "d"], ["c", "b"], ["a"]]
+
+async def test_full_last_page_ends_with_an_empty_page(db):
+    await db.tag_history.insert_many([history_row(row_id, T0) for row_id in "abcd"])
+
+    assert await all_pages(db, limit=2) == [["d", "c"], ["b", "a"], []]
+
+async def test_date_rows_use_epoch_millis_cursor(db):
+    await db.tag_history.insert_many([
+        history_row("a", T0),
+        history_row("b", T0 + timedelta(seconds=1)),
+        history_row("c", T0 + timedelta(seconds=2)),
+    ])
+
+    page = await get_tag_history("QR-1", limit=2, admin=None, service=AdminService(db))
+
+    millis = (T0 + timedelta(seconds=1) - EPOCH) // timedelta(milliseconds=1)
+    assert page["next_cursor"] == f"{millis}|b"
+    assert await all_pages(db, limit=2) == [["c", "b"], ["a"]]
+
+async def test_legacy_string_rows_use_iso_cursor_after_date_rows(db):
+    await db.tag_history.insert_many([
+        history_row("d1", T0 + timedelta(days=2)),
+        history_row("d2", T0 + timedelta(days=1)),
+        history_row("s1", T0.isoformat()),
+        history_row("s2", T0.isoformat()),
+        history_row("s3", (T0 - timedelta(days=1)).isoformat()),
+    ])
+
+    # Dates sort before strings in a descending scan
+    assert await all_pages(db, limit=2) == [["d1", "d2"], ["s2", "s1"], ["s3"]]
+
+    first = await get_tag_history("QR-1", limit=3, admin=None, service=AdminService(db))
+    assert first["next_cursor"] == f"{T0.isoformat()}|s2"
+
+@pytest.mark.parametrize("cursor", ["not-a-date|x", "12.5|x", "|x"])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        keyset_filter(cursor)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from migrate_dates import DATE_FIELDS, migrate_collection
+
+pytestmark = pytest.mark.anyio
+
+ASSIGNED = datetime(2024, 5, 1, 9, 30, 0, 123000, tzinfo=timezone.utc)
+EXPIRES = datetime(2025, 5, 1, 9, 30, tzinfo=timezone.utc)
+
+async def migrate_all(db) -> int:
+    updated = 0
+    for name, fields in DATE_FIELDS.items():
+        updated += await migrate_collection(db, name, fields)
+    return updated
+
+async def test_string_timestamps_become_dates(db):
+    await db.tags.insert_one({
+        "id": "t1",
+        "created_at": ASSIGNED.isoformat(),
+        "assigned_at": ASSIGNED.isoformat(),
+        "activated_at": "",
+        "expires_at": EXPIRES.isoformat(),
+        "scrapped_at": None,
+    })
+    await db.businesses.insert_one({
+        "id": "b1",
+        "created_at": ASSIGNED.isoformat(),
+        "subscription_expires_at": "",
+    })
+
+    assert await migrate_all(db) == 2
+
+    tag = await db.tags.find_one({"id": "t1"})
+    assert tag["created_at"] == ASSIGNED
+    assert tag["assigned_at"] == ASSIGNED
+    assert tag["expires_at"] == EXPIRES
+    assert tag["activated_at"] is None  # empty string meant "not set"
+    assert tag["scrapped_at"] is None
+    business = await db.businesses.find_one({"id": "b1"})
+    assert business["created_at"] == ASSIGNED
+    assert business["subscription_expires_at"] is None
+
+    # Migrated tags are now found by the expiring-tag date range
+    expiring = await db.tags.count_documents({"expires_at": {"$gte": ASSIGNED, "$lte": EXPIRES}})
+    assert expiring == 1
+
+async def test_date_rows_are_left_alone(db):
+    await db.tags.insert_one({"id": "t1", "created_at": ASSIGNED, "expires_at": EXPIRES})
+
+    assert await migrate_all(db) == 0
+    assert (await db.tags.find_one({"id": "t1"}))["expires_at"] == EXPIRES
+
+async def test_rerun_is_a_no_op(db):
+    await db.tags.insert_one({"id": "t1", "created_at": ASSIGNED.isoformat()})
+
+    assert await migrate_all(db) == 1
+    assert await migrate_all(db) == 0
+
+async def test_admin_sessions_become_visible_to_expiry_checks(db):
+    await db.admin_sessions.insert_one({
+        "token": "tok",
+        "created_at": ASSIGNED.isoformat(),
+        "expires_at": EXPIRES.isoformat(),
+    })
+    # verify_admin_session's bound; a string expires_at never compares to it
+    unexpired = {"token": "tok", "expires_at": {"$gt": ASSIGNED}}
+    assert await db.admin_sessions.count_documents(unexpired) == 0
+
+    assert await migrate_all(db) == 1
+
+    assert await db.admin_sessions.count_documents(unexpired) == 1
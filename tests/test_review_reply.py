@@ -0,0 +1,54 @@
+import pytest
+
+import google_business_service
+import server
+from business_cache import invalidate_business
+
+pytestmark = pytest.mark.anyio
+
+class StubReviewsApi:
+    """Records updateReply calls in place of the discovery-built client"""
+
+    def __init__(self):
+        self.replies = []
+
+    def accounts(self):
+        return self
+
+    def locations(self):
+        return self
+
+    def reviews(self):
+        return self
+
+    def updateReply(self, name, body):
+        self.replies.append((name, body))
+        return self
+
+    def execute(self, http=None):
+        return {}
+
+@pytest.fixture
+def verified_business(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+    invalidate_business("biz-1")
+    yield {
+        "id": "biz-1",
+        "name": "Cafe",
+        "google_verified": True,
+        "google_access_token": "token",
+        "google_location_name": "locations/1",
+    }
+    invalidate_business("biz-1")
+
+async def test_reply_is_posted_through_api_client(db, monkeypatch, verified_business, fake_request):
+    await db.businesses.insert_one(dict(verified_business))
+    stub = StubReviewsApi()
+    monkeypatch.setitem(google_business_service._api_clients, ("mybusinessbusinessinformation", "v1"), stub)
+
+    result = await server.post_review_reply("biz-1", "rev-1", fake_request({"reply_text": "Thanks!"}))
+
+    assert result["success"] is True
+    assert stub.replies == [("locations/1/reviews/rev-1", {"comment": "Thanks!"})]
+    reply = await db.review_replies.find_one({"review_id": "rev-1"})
+    assert reply["status"] == "posted"
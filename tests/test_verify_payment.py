@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import hmac
+
+import pytest
+from fastapi import HTTPException
+
+import payment_routes
+from subscription_models import Currency, Payment, PaymentStatus, PaymentVerifyRequest, PlanType
+from subscription_service import SubscriptionService
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-secret"
+
+class StubPayments:
+    def fetch(self, payment_id):
+        return {"id": payment_id, "status": "captured", "notes": {"coupon_code": "none"}}
+
+class StubRazorpay:
+    payment = StubPayments()
+
+@pytest.fixture
+def service(db, monkeypatch):
+    monkeypatch.setattr(payment_routes, "razorpay_key_secret", SECRET)
+    monkeypatch.setattr(payment_routes, "_razorpay_secret_bytes", SECRET.encode("utf-8"))
+    monkeypatch.setattr(payment_routes, "razorpay_client", StubRazorpay())
+    return SubscriptionService(db)
+
+@pytest.fixture
+async def pending_payment(db):
+    # Stored the way create_subscription_order stores it
+    payment = Payment(
+        id="pay-1",
+        business_id="biz-1",
+        amount=99.0,
+        currency=Currency.INR,
+        razorpay_order_id="order_1",
+        status=PaymentStatus.PENDING,
+    )
+    await db.payments.insert_one(payment.model_dump())
+
+def verify_request() -> PaymentVerifyRequest:
+    signature = hmac.new(SECRET.encode("utf-8"), b"order_1|pay_rzp_1", hashlib.sha256).hexdigest()
+    return PaymentVerifyRequest(
+        business_id="biz-1",
+        razorpay_order_id="order_1",
+        razorpay_payment_id="pay_rzp_1",
+        razorpay_signature=signature,
+        plan_type=PlanType.MONTHLY,
+        currency=Currency.INR,
+    )
+
+async def test_concurrent_verifies_create_one_subscription(db, service, pending_payment):
+    results = await asyncio.gather(
+        payment_routes.verify_subscription_payment(verify_request(), service),
+        payment_routes.verify_subscription_payment(verify_request(), service),
+        return_exceptions=True,
+    )
+
+    errors = [r for r in results if isinstance(r, HTTPException)]
+    assert len(errors) == 1
+    assert (errors[0].status_code, errors[0].detail) == (400, "Payment already processed")
+    assert await db.subscriptions.count_documents({"business_id": "biz-1"}) == 1
+
+    subscription = await db.subscriptions.find_one({"business_id": "biz-1"})
+    payment = await db.payments.find_one({"id": "pay-1"})
+    assert payment["status"] == "completed"
+    assert payment["subscription_id"] == subscription["id"]
+
+async def test_failed_subscription_releases_the_claim(db, service, pending_payment, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(service, "create_subscription", fail)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await payment_routes.verify_subscription_payment(verify_request(), service)
+    assert excinfo.value.status_code == 500
+
+    payment = await db.payments.find_one({"id": "pay-1"})
+    assert payment["status"] == "pending"
+    assert "completed_at" not in payment
+    assert "subscription_id" not in payment
+    assert await db.subscriptions.count_documents({}) == 0
+
+    # The released payment can be verified again
+    monkeypatch.undo()
+    service = SubscriptionService(db)
+    monkeypatch.setattr(payment_routes, "razorpay_key_secret", SECRET)
+    monkeypatch.setattr(payment_routes, "_razorpay_secret_bytes", SECRET.encode("utf-8"))
+    monkeypatch.setattr(payment_routes, "razorpay_client", StubRazorpay())
+    result = await payment_routes.verify_subscription_payment(verify_request(), service)
+    assert result.status_code == 200
+    assert await db.subscriptions.count_documents({}) == 1